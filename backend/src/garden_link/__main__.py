@@ -1,20 +1,41 @@
 from . import (
+    admission,
+    camera,
     landscape_recognition,
     plan_customizing,
     satisfaction_survey,
+    scene_cache,
+    tickets,
     utils,
     config,
 )
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 import uvicorn
-from typing import Generator, List
+import cv2
+from typing import AsyncGenerator, List
+from contextlib import asynccontextmanager
+import asyncio
 import sys
 from pydantic import BaseModel
 
 
-app = FastAPI(title="HAGCC API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        camera.get_service(config.CAMERA_INDEX)
+    except RuntimeError as e:
+        # 摄像头暂不可用时不阻止启动，拍照时会再次尝试打开
+        print(f"摄像头启动失败：{e}")
+    yield
+    camera.shutdown()
+    tickets.shutdown()
+    await utils.aio.close()
+
+
+app = FastAPI(title="HAGCC API", lifespan=lifespan)
 
 # 配置 CORS
 app.add_middleware(
@@ -31,19 +52,89 @@ async def root():
     return {"status": "ok"}
 
 
+async def _capture() -> cv2.typing.MatLike:
+    """在线程池中拍照，避免阻塞事件循环"""
+    return await asyncio.to_thread(utils.take_photo, config.CAMERA_INDEX)
+
+
+async def _encode(
+    frame: cv2.typing.MatLike, max_edge: int | None, crop: str | None
+) -> str:
+    """在线程池中缩放并编码图像"""
+    return await asyncio.to_thread(
+        lambda: utils.image_to_data_url(utils.prepare_image(frame, max_edge, crop))
+    )
+
+
+async def _replay(chunks: list[str]) -> AsyncGenerator[str, None]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def _holding(
+    slot: admission.Slot, chunks: AsyncGenerator[str, None]
+) -> AsyncGenerator[str, None]:
+    """流式输出期间占用推理槽位，输出结束或中断时释放"""
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        slot.release()
+
+
+def _overloaded(e: admission.Overloaded) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+async def _landscape_chunks(use_cache: bool) -> AsyncGenerator[str, None]:
+    frame = await _capture()
+    key = await asyncio.to_thread(scene_cache.perceptual_hash, frame)
+
+    cached = landscape_recognition.cache.get(key) if use_cache else None
+    if cached is not None:
+        return _replay(cached)
+
+    image_url = await _encode(
+        frame, config.LANDSCAPE_IMAGE_MAX_EDGE, config.LANDSCAPE_IMAGE_CROP
+    )
+    slot = await admission.scheduler.acquire(admission.Priority.LANDSCAPE)
+    return _holding(slot, landscape_recognition._analyze_image_cached(image_url, key))
+
+
 @app.post("/api/landscape-recognition")
-async def analyze_landscape():
+async def analyze_landscape(cache_control: str | None = Header(default=None)):
     try:
-        base64 = utils.image_to_base64(utils.take_photo(config.CAMERA_INDEX))
-        def generate() -> Generator[str, None, None]:
-            for chunk in landscape_recognition._analyze_image(base64):
+        # 请求头带 Cache-Control: no-cache 时跳过缓存，强制重新生成
+        use_cache = "no-cache" not in (cache_control or "")
+        # 同一时间窗口内的请求共用一次拍照和模型调用，流式结果分发给每个请求
+        chunks = await landscape_recognition.flights.stream(
+            use_cache, lambda: _landscape_chunks(use_cache)
+        )
+
+        async def generate() -> AsyncGenerator[str, None]:
+            async for chunk in chunks:
                 if chunk != utils.NULL_TEXT:
                     yield chunk
+
         return StreamingResponse(generate(), media_type="text/plain")
+    except admission.Overloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/landscape-recognition/cache")
+async def landscape_cache_stats():
+    return {
+        **landscape_recognition.cache.stats(),
+        "coalescing": landscape_recognition.flights.stats(),
+    }
+
+
 class PlanCustomizingRequest(BaseModel):
     prior_knowledge: str
     duration: str
@@ -55,38 +146,49 @@ async def customize_plan(
     req: PlanCustomizingRequest,
 ):
     try:
-        def generate() -> Generator[str, None, None]:
-            for chunk in plan_customizing._generate_plan(
+        slot = await admission.scheduler.acquire(admission.Priority.PLAN)
+        chunks = _holding(
+            slot,
+            plan_customizing._generate_plan_async(
                 req.prior_knowledge, req.duration, req.preferences
-            ):
-                yield chunk
-
-        return StreamingResponse(generate(), media_type="text/plain")
+            ),
+        )
+        # 响应结束后再释放一次（可重复释放），生成器未被执行时槽位也不会泄漏
+        return StreamingResponse(
+            chunks, media_type="text/plain", background=BackgroundTask(slot.release)
+        )
+    except admission.Overloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _survey_scores() -> list[int]:
+    frame = await _capture()
+    if satisfaction_survey.engine() == "local":
+        return await asyncio.to_thread(satisfaction_survey.score_faces, frame)
+
+    image_url = await _encode(
+        frame,
+        config.SATISFACTION_IMAGE_MAX_EDGE,
+        config.SATISFACTION_IMAGE_CROP,
+    )
+    async with admission.scheduler.slot(admission.Priority.SURVEY):
+        res = await satisfaction_survey._analyze_image_async(image_url)
+    return satisfaction_survey._parse_scores(res)
+
+
 @app.post("/api/satisfaction-survey")
 async def analyze_satisfaction():
     try:
-        base64 = utils.image_to_base64(utils.take_photo(config.CAMERA_INDEX))
-        res = satisfaction_survey._analyze_image(base64)
+        # 同一时间窗口内的请求共用一次拍照和打分
+        scores = await satisfaction_survey.flights.call(
+            satisfaction_survey.engine(), _survey_scores
+        )
 
-        if res == utils.NULL_TEXT:
+        if not scores:
             return {"scores": [], "total": 0, "message": "未识别到人脸"}
 
-        scores = []
-        for r in res.strip().split(","):
-            s = r.strip()
-            if s.isdigit():
-                x = int(s)
-                if 1 <= x <= 5:
-                    scores.append(x)
-                else:
-                    raise HTTPException(status_code=500, detail=f"无效的分数：{x}")
-            else:
-                raise HTTPException(status_code=500, detail=f"无法解析响应：{res}")
-
         return {
             "scores": scores,
             "total": sum(scores),
@@ -95,10 +197,43 @@ async def analyze_satisfaction():
         }
     except HTTPException:
         raise
+    except admission.Overloaded as e:
+        raise _overloaded(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admission/stats")
+async def admission_stats():
+    return admission.scheduler.stats()
+
+
+class TicketValidationRequest(BaseModel):
+    code: str
+
+
+@app.post("/api/ticket-validation")
+async def validate_ticket(req: TicketValidationRequest):
+    try:
+        # 门票库在首次核验时才打开，未配置检票不影响其他接口
+        valid, reason = await asyncio.to_thread(
+            lambda: tickets.get_store().validate(req.code)
+        )
+        return {"valid": valid, "reason": reason}
+    except tickets.NotConfigured as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/ticket-validation/stats")
+async def ticket_stats():
+    try:
+        return await asyncio.to_thread(lambda: tickets.get_store().stats())
+    except tickets.NotConfigured as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
 def cli():
     """命令行模式"""
     try:
@@ -118,6 +253,8 @@ def cli():
             print()
     except KeyboardInterrupt:
         print(flush=True)
+    finally:
+        camera.shutdown()
 
 
 def main():
@@ -0,0 +1,194 @@
+"""LM Studio 准入控制
+
+推理服务器只有固定数量的并行槽位，多出的请求在服务器端排队，旅行团集中使用时会一起拖到超时。
+这里在发出请求前按优先级排队（满意度调查 > 景观识别 > 游览计划），同时发往服务器的请求数
+不超过槽位数；预计排队时间超过该优先级的上限时立即拒绝，排队超时也拒绝，
+由接口返回 503 和 Retry-After，让前端稍后重试而不是一起等到超时。
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+from . import config
+
+
+class Priority(IntEnum):
+    """数值越小越优先"""
+
+    SURVEY = 0
+    LANDSCAPE = 1
+    PLAN = 2
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"推理服务繁忙，请 {retry_after} 秒后重试")
+        self.retry_after = retry_after
+
+
+class Slot:
+    """一个已占用的推理槽位，用完后调用 ``release``（可重复调用）"""
+
+    def __init__(self, scheduler: "AdmissionScheduler", priority: Priority) -> None:
+        self.scheduler = scheduler
+        self.priority = priority
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self.scheduler._release(self)
+
+
+class AdmissionScheduler:
+    # 服务时间的指数滑动平均系数
+    SMOOTHING = 0.2
+
+    def __init__(
+        self,
+        max_concurrency: int = config.MODEL_MAX_CONCURRENCY,
+        queue_timeouts: dict[Priority, float] | None = None,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.queue_timeouts = queue_timeouts or {
+            Priority.SURVEY: config.SURVEY_QUEUE_TIMEOUT,
+            Priority.LANDSCAPE: config.LANDSCAPE_QUEUE_TIMEOUT,
+            Priority.PLAN: config.PLAN_QUEUE_TIMEOUT,
+        }
+        self._running: set[Slot] = set()
+        # (优先级, 序号, future)，同一优先级先到先得；取消的条目在出队时跳过
+        self._queue: list[tuple[Priority, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # 各优先级的平均服务时间（秒），用于估算排队时间
+        self.service_times: dict[Priority, float] = {}
+        self.admitted = dict.fromkeys(Priority, 0)
+        self.rejected = dict.fromkeys(Priority, 0)
+        self._waits: dict[Priority, deque[float]] = {
+            priority: deque(maxlen=256) for priority in Priority
+        }
+
+    def _waiting(self, priority: Priority | None = None) -> list[Priority]:
+        """排在 ``priority`` 之前（含同级）的等待请求"""
+        return [
+            p
+            for p, _, future in self._queue
+            if not future.done() and (priority is None or p <= priority)
+        ]
+
+    def estimate_wait(self, priority: Priority) -> float | None:
+        """估算新请求的排队时间，尚无服务时间数据时返回 None"""
+        ahead = self._waiting(priority)
+        if len(self._running) < self.max_concurrency and not ahead:
+            return 0.0
+        try:
+            now = time.monotonic()
+            remaining = sum(
+                max(0.0, self.service_times[slot.priority] - (now - slot.started))
+                for slot in self._running
+            )
+            queued = sum(self.service_times[p] for p in ahead)
+        except KeyError:
+            return None
+        return (remaining + queued) / self.max_concurrency
+
+    def _retry_after(self, estimate: float | None, priority: Priority) -> int:
+        if estimate is None:
+            estimate = self.queue_timeouts[priority]
+        return max(1, math.ceil(estimate))
+
+    def _reject(self, priority: Priority, estimate: float | None) -> Overloaded:
+        self.rejected[priority] += 1
+        return Overloaded(self._retry_after(estimate, priority))
+
+    def _admitted(self, priority: Priority, waited: float) -> None:
+        self.admitted[priority] += 1
+        self._waits[priority].append(waited)
+
+    async def acquire(self, priority: Priority) -> Slot:
+        """等待一个推理槽位；预计或实际排队超时时抛出 Overloaded"""
+        started = time.monotonic()
+        if len(self._running) < self.max_concurrency and not self._waiting(priority):
+            slot = Slot(self, priority)
+            self._running.add(slot)
+            self._admitted(priority, 0.0)
+            return slot
+        timeout = self.queue_timeouts[priority]
+        estimate = self.estimate_wait(priority)
+        if estimate is not None and estimate > timeout:
+            raise self._reject(priority, estimate)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future))
+        try:
+            slot = await asyncio.wait_for(future, timeout)
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # 槽位恰好在超时或取消时交给了本请求，转交给下一个
+                self._release(future.result(), record=False)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject(priority, self.estimate_wait(priority)) from None
+        self._admitted(priority, time.monotonic() - started)
+        return slot
+
+    def _release(self, slot: Slot, record: bool = True) -> None:
+        self._running.discard(slot)
+        if record:
+            elapsed = time.monotonic() - slot.started
+            average = self.service_times.get(slot.priority)
+            self.service_times[slot.priority] = (
+                elapsed
+                if average is None
+                else average + self.SMOOTHING * (elapsed - average)
+            )
+        # 把槽位直接交给优先级最高的等待者，交接期间不会被新到的请求抢占
+        while self._queue:
+            priority, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                slot = Slot(self, priority)
+                self._running.add(slot)
+                future.set_result(slot)
+                return
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority):
+        slot = await self.acquire(priority)
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    def stats(self) -> dict:
+        waiting = self._waiting()
+        stats = {
+            "max_concurrency": self.max_concurrency,
+            "running": len(self._running),
+            "queued": len(waiting),
+        }
+        for priority in Priority:
+            waits = sorted(self._waits[priority])
+            service_time = self.service_times.get(priority)
+            stats[priority.name.lower()] = {
+                "queued": waiting.count(priority),
+                "admitted": self.admitted[priority],
+                "rejected": self.rejected[priority],
+                "wait_ms": {
+                    "mean": round(sum(waits) / len(waits) * 1000, 1) if waits else 0,
+                    "p95": round(waits[int(len(waits) * 0.95)] * 1000, 1)
+                    if waits
+                    else 0,
+                    "max": round(waits[-1] * 1000, 1) if waits else 0,
+                },
+                "service_ms": round(service_time * 1000, 1) if service_time else None,
+            }
+        return stats
+
+
+scheduler = AdmissionScheduler()
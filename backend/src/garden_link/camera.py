@@ -0,0 +1,151 @@
+"""常驻摄像头采集服务
+
+每个摄像头由一个后台线程独占，持续读取画面写入带时间戳的环形缓冲区，
+``take_photo`` 只需取出最新一帧，无需反复打开设备、等待自动曝光。
+"""
+
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from . import config
+
+
+class CaptureService:
+    def __init__(
+        self,
+        camera_index: int = config.CAMERA_INDEX,
+        buffer_size: int = config.CAMERA_BUFFER_SIZE,
+    ) -> None:
+        self.camera_index = camera_index
+        self._frames: deque[tuple[float, cv2.typing.MatLike]] = deque(
+            maxlen=buffer_size
+        )
+        self._cond = threading.Condition()
+        self._cap: cv2.VideoCapture | None = None
+        self._thread: threading.Thread | None = None
+        self._running = False
+        # 每次 start 加一；stop 后未及时退出的旧线程据此得知自己已过期，不会改动新一轮的状态
+        self._generation = 0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            cap = cv2.VideoCapture(self.camera_index)
+            if not cap.isOpened():
+                cap.release()
+                raise RuntimeError("无法打开摄像头")
+            # 只保留驱动中最新的一帧，避免读到排队的旧画面
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self._cap = cap
+            self._frames.clear()
+            self._running = True
+            self._generation += 1
+            self._thread = threading.Thread(
+                target=self._capture_loop,
+                args=(cap, self._generation),
+                name=f"camera-{self.camera_index}",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _current(self, generation: int) -> bool:
+        return self._running and self._generation == generation
+
+    def _capture_loop(self, cap: cv2.VideoCapture, generation: int) -> None:
+        warmup = config.CAMERA_WARMUP_FRAMES
+        failures = 0
+        try:
+            while self._current(generation):
+                ret, frame = cap.read()
+                if not ret or frame is None:
+                    failures += 1
+                    if failures >= config.CAMERA_MAX_READ_FAILURES:
+                        print(f"摄像头 {self.camera_index} 连续读取失败，停止采集")
+                        break
+                    time.sleep(0.05)
+                    continue
+                failures = 0
+                # 丢弃刚打开时自动曝光尚未稳定的暗帧
+                if warmup > 0:
+                    warmup -= 1
+                    continue
+                with self._cond:
+                    if not self._current(generation):
+                        break
+                    self._frames.append((time.monotonic(), frame))
+                    self._cond.notify_all()
+        finally:
+            cap.release()
+            with self._cond:
+                if self._generation == generation:
+                    self._running = False
+                    self._cap = None
+                    self._cond.notify_all()
+
+    def latest(
+        self,
+        max_age: float = config.CAMERA_FRAME_MAX_AGE,
+        timeout: float = config.CAMERA_WAIT_TIMEOUT,
+    ) -> cv2.typing.MatLike:
+        """返回不早于 ``max_age`` 秒的最新一帧，必要时等待至多 ``timeout`` 秒。
+
+        返回的数组与缓冲区共享，调用方如需修改应自行复制。
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._frames:
+                    timestamp, frame = self._frames[-1]
+                    if time.monotonic() - timestamp <= max_age:
+                        return frame
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    raise RuntimeError("无法读取摄像头图像")
+                self._cond.wait(remaining)
+
+    def snapshot(self) -> list[tuple[float, cv2.typing.MatLike]]:
+        """按时间顺序返回缓冲区中的全部帧"""
+        with self._cond:
+            return list(self._frames)
+
+
+_services: dict[int, CaptureService] = {}
+_services_lock = threading.Lock()
+
+
+def get_service(camera_index: int = config.CAMERA_INDEX) -> CaptureService:
+    """获取（并在需要时启动）指定摄像头的采集服务"""
+    with _services_lock:
+        service = _services.get(camera_index)
+        if service is None:
+            service = _services[camera_index] = CaptureService(camera_index)
+    if not service.running:
+        service.start()
+    return service
+
+
+def shutdown() -> None:
+    """停止所有采集服务并释放摄像头"""
+    with _services_lock:
+        services = list(_services.values())
+        _services.clear()
+    for service in services:
+        service.stop()
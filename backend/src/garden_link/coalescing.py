@@ -0,0 +1,127 @@
+"""并发请求合并（single-flight）
+
+两块展示屏同时点击或用户连点时，短时间内的相同请求共用一次拍照和一次模型调用：
+第一个请求发起调用，时间窗口内到达的其余请求加入同一次调用，等待同一个结果；
+流式结果由后台任务统一读取并缓存已收到的片段，每个请求各自从头回放，
+因此中途加入或提前断开的客户端都不影响其他请求。
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable
+from typing import TypeVar
+
+from . import config
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.task: asyncio.Task | None = None
+        # 流式调用的准备阶段（拍照、编码、发起请求），结果为片段迭代器，出错时带异常
+        self.ready: asyncio.Task | None = None
+        self.chunks: list = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.changed = asyncio.Condition()
+
+
+class SingleFlight:
+    def __init__(self, window: float = config.COALESCE_WINDOW) -> None:
+        self.window = window
+        self.calls = 0  # 实际发起的调用次数
+        self.shared = 0  # 加入已有调用的请求数
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def _join(self, key: Hashable) -> tuple[_Flight, bool]:
+        """返回 ``key`` 对应的调用，以及调用方是否需要发起它"""
+        flight = self._flights.get(key)
+        if flight is not None and time.monotonic() - flight.started <= self.window:
+            self.shared += 1
+            return flight, False
+        flight = _Flight()
+        self._flights[key] = flight
+        self.calls += 1
+        return flight, True
+
+    async def call(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """合并执行 ``func``，所有加入的请求得到同一个结果或异常"""
+        flight, leader = self._join(key)
+        if leader:
+            flight.task = asyncio.ensure_future(func())
+            flight.task.add_done_callback(lambda _: self._evict_later(key, flight))
+        # 某个请求被取消（客户端断开）时不取消共享的调用
+        return await asyncio.shield(flight.task)
+
+    async def stream(
+        self, key: Hashable, start: Callable[[], Awaitable[AsyncIterator[T]]]
+    ) -> AsyncIterator[T]:
+        """合并执行流式调用
+
+        ``start`` 完成准备工作并返回片段迭代器，其中的异常在这里抛出，
+        调用方可以在开始响应之前处理；返回的迭代器从第一个片段开始回放。
+        """
+        flight, leader = self._join(key)
+        if leader:
+            flight.ready = asyncio.ensure_future(start())
+            flight.task = asyncio.ensure_future(self._pump(key, flight))
+        assert flight.ready is not None
+        await asyncio.shield(flight.ready)
+        return self._replay(flight)
+
+    async def _pump(self, key: Hashable, flight: _Flight) -> None:
+        reader = asyncio.ensure_future(self._read(flight))
+        try:
+            # wait 不抛出 reader 的异常，取出后由各个请求在回放结束时抛出
+            await asyncio.wait([reader])
+            if not reader.cancelled():
+                flight.error = reader.exception()
+        finally:
+            reader.cancel()
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+            self._evict_later(key, flight)
+
+    async def _read(self, flight: _Flight) -> None:
+        assert flight.ready is not None
+        chunks = await flight.ready
+        async for chunk in chunks:
+            async with flight.changed:
+                flight.chunks.append(chunk)
+                flight.changed.notify_all()
+
+    def _evict_later(self, key: Hashable, flight: _Flight) -> None:
+        """调用结束且时间窗口已过后移除，窗口内到达的请求仍可加入"""
+        delay = flight.started + self.window - time.monotonic()
+        asyncio.get_running_loop().call_later(max(0.0, delay), self._evict, key, flight)
+
+    def _evict(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def _replay(self, flight: _Flight) -> AsyncIterator[T]:
+        i = 0
+        while True:
+            async with flight.changed:
+                while i == len(flight.chunks) and not flight.done:
+                    await flight.changed.wait()
+                pending = flight.chunks[i:]
+                finished = flight.done
+            for chunk in pending:
+                yield chunk
+            i += len(pending)
+            if finished and i == len(flight.chunks):
+                if flight.error is not None:
+                    raise flight.error
+                return
+
+    def stats(self) -> dict:
+        total = self.calls + self.shared
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "shared_ratio": self.shared / total if total else 0,
+        }
@@ -1,12 +1,81 @@
 # 配置文件
 
+import os
+
 LM_STUDIO_URL = "http://192.168.0.167:1234/v1"
 CAMERA_INDEX = 0  # USB 摄像头索引，通常为 0，如果有多个摄像头则尝试 1、2 等
 IMAGE_QUALITY = 85  # JPEG 压缩质量（1-100）
 
+# 发送给视觉模型前的缩放与裁剪策略
+VLM_PATCH_SIZE = 32  # 每个图像 token 覆盖的像素边长（qwen3-vl：patch 16 × 2x2 合并）
+IMAGE_CENTER_CROP_RATIO = 0.8  # 中心裁剪保留的宽高比例
+IMAGE_FACE_MARGIN = 0.5  # 人脸裁剪时向外扩展的比例（相对人脸框边长）
+LANDSCAPE_IMAGE_MAX_EDGE = 896  # 景观识别图像的最长边（像素），None 表示不缩放
+LANDSCAPE_IMAGE_CROP = None  # 景观识别裁剪方式：None、"center" 或 "face"
+SATISFACTION_IMAGE_MAX_EDGE = 1024  # 满意度调查图像的最长边（像素）
+SATISFACTION_IMAGE_CROP = "face"  # 满意度调查裁剪方式
+
+# 景观识别结果缓存
+SCENE_CACHE_SIZE = 64  # 最多缓存的画面数
+SCENE_CACHE_TTL = 600  # 缓存有效期（秒）
+SCENE_CACHE_MAX_DISTANCE = 6  # 视为同一画面的最大 pHash 汉明距离（0-7）
+
+CAMERA_BUFFER_SIZE = 4  # 采集环形缓冲区保留的帧数
+CAMERA_FRAME_MAX_AGE = 0.5  # 拍照时可接受的最旧帧（秒）
+CAMERA_WAIT_TIMEOUT = 5  # 等待新帧的最长时间（秒）
+CAMERA_WARMUP_FRAMES = 5  # 打开摄像头后丢弃的帧数，等待自动曝光稳定
+CAMERA_MAX_READ_FAILURES = 50  # 连续读取失败多少次后停止采集
+
+COALESCE_WINDOW = 1.0  # 该时间内（秒）到达的相同请求共用一次拍照和模型调用
+
 MODEL_TIMEOUT = 30  # API 请求超时时间（秒）
 MODEL_TEMPERATURE = 0.7  # 模型温度参数
 MODEL_MAX_TOKENS = 500  # 最大返回 token 数
 
+# LM Studio 准入控制：按优先级排队（满意度调查 > 景观识别 > 游览计划），排队超时返回 503
+MODEL_MAX_CONCURRENCY = 1  # 同时发往 LM Studio 的请求数，与服务器的并行槽位数一致
+SURVEY_QUEUE_TIMEOUT = 5  # 满意度调查的最长排队时间（秒）
+LANDSCAPE_QUEUE_TIMEOUT = 10  # 景观识别的最长排队时间（秒）
+PLAN_QUEUE_TIMEOUT = 20  # 游览计划的最长排队时间（秒）
+
+# LM Studio 连接池（所有请求都发往同一主机，总连接数即单主机连接数）
+HTTP_MAX_CONNECTIONS = 8  # 最大并发连接数
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 4  # 空闲时保持的长连接数
+HTTP_KEEPALIVE_EXPIRY = 60  # 空闲长连接的保活时间（秒）
+
 LANDSCAPE_RECOGNITION_MODEL = "qwen3-vl-8b"
 SATISFACTION_SURVEY_VISUAL_MODEL = "qwen3-vl-8b"
+
+# 满意度调查引擎："local" 使用本地人脸表情模型，"vlm" 使用视觉大模型；
+# 本地模型文件不存在时自动改用视觉大模型（模型下载方法见 README）
+SATISFACTION_SURVEY_ENGINE = "local"
+MODELS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "models",
+)  # backend/models
+FACE_DETECTION_MODEL = os.path.join(MODELS_DIR, "face_detection_yunet_2023mar.onnx")
+FACIAL_EXPRESSION_MODEL = os.path.join(
+    MODELS_DIR, "facial_expression_recognition_mobilefacenet_2022july.onnx"
+)
+FACE_DETECTION_THRESHOLD = 0.6  # 人脸检测置信度阈值
+FACE_DETECTION_MAX_EDGE = 640  # 人脸检测输入图像的最长边（像素）
+
+# 门票核验
+# 签名密钥不写进仓库：优先读取环境变量，其次读取部署目录中的密钥文件；
+# 都没有时检票接口返回 503，其他接口不受影响
+TICKET_SECRET = os.environ.get("GARDEN_LINK_TICKET_SECRET")
+TICKET_SECRET_FILE = os.environ.get(
+    "GARDEN_LINK_TICKET_SECRET_FILE", "/etc/garden-link/ticket-secret"
+)
+# 已签发门票的 SQLite 数据库，后端和 legacy 检票必须使用同一个绝对路径，核销才能跨进程生效；
+# 默认放在运行用户的数据目录下，无需 root 权限
+TICKET_DATABASE = os.environ.get(
+    "GARDEN_LINK_TICKET_DATABASE",
+    os.path.join(
+        os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"),
+        "garden-link",
+        "tickets.db",
+    ),
+)
+TICKET_BLOOM_CAPACITY = 1_000_000  # 布隆过滤器按此门票数量分配空间
+TICKET_BLOOM_ERROR_RATE = 0.001  # 布隆过滤器误判率
@@ -1,5 +1,5 @@
-from . import config, utils
-from typing import Generator
+from . import coalescing, config, scene_cache, utils
+from typing import AsyncGenerator, Generator
 
 
 PROMPT = f"""请仔细观察这张图片，判断其中是否包含自然景观（如山川、河流、湖泊、森林等）或人文景观（如古建筑、园林、名胜古迹等）。
@@ -14,23 +14,31 @@ PROMPT = f"""请仔细观察这张图片，判断其中是否包含自然景观
 请直接给出至多一个答案，不需要额外的解释说明。"""
 
 
-def _analyze_image(base64: str) -> Generator[str, None, None]:
+cache = scene_cache.SceneCache()
+flights = coalescing.SingleFlight()
+
+
+def _messages(image_url: str) -> list:
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": PROMPT},
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": image_url,
+                    },
+                },
+            ],
+        }
+    ]
+
+
+def _analyze_image(image_url: str) -> Generator[str, None, None]:
     response = utils.ai.chat.completions.create(
         model=config.LANDSCAPE_RECOGNITION_MODEL,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": PROMPT},
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64}",
-                        },
-                    },
-                ],
-            }
-        ],
+        messages=_messages(image_url),
         temperature=config.MODEL_TEMPERATURE,
         max_tokens=config.MODEL_MAX_TOKENS,
         timeout=config.MODEL_TIMEOUT,
@@ -42,10 +50,37 @@ def _analyze_image(base64: str) -> Generator[str, None, None]:
             yield content
 
 
+async def _analyze_image_async(image_url: str) -> AsyncGenerator[str, None]:
+    response = await utils.aio.chat.completions.create(
+        model=config.LANDSCAPE_RECOGNITION_MODEL,
+        messages=_messages(image_url),
+        temperature=config.MODEL_TEMPERATURE,
+        max_tokens=config.MODEL_MAX_TOKENS,
+        timeout=config.MODEL_TIMEOUT,
+        stream=True,
+    )
+    async for chunk in response:
+        content = chunk.choices[0].delta.content
+        if content:
+            yield content
+
+
+async def _analyze_image_cached(image_url: str, key: int) -> AsyncGenerator[str, None]:
+    """流式输出识别结果，完整结束后以画面哈希 ``key`` 写入缓存"""
+    chunks = []
+    async for chunk in _analyze_image_async(image_url):
+        chunks.append(chunk)
+        yield chunk
+    cache.put(key, chunks)
+
+
 def capture():
     frame = utils.take_photo(config.CAMERA_INDEX)
-    image_base64 = utils.image_to_base64(frame)
-    for chunk in _analyze_image(image_base64):
+    frame = utils.prepare_image(
+        frame, config.LANDSCAPE_IMAGE_MAX_EDGE, config.LANDSCAPE_IMAGE_CROP
+    )
+    image_url = utils.image_to_data_url(frame)
+    for chunk in _analyze_image(image_url):
         if chunk != utils.NULL_TEXT:
             print(chunk, end="")
     print()
@@ -1,5 +1,5 @@
 from . import config, utils
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 
 PROMPT_TEMPLATE = """拙政园是江南古典园林的代表作之一，始建于明代，由王献臣建造。园林分为东、中、西三部分，拥有远香堂、香洲、见山楼、梧竹幽居、玉兰堂等众多景点。园林设计体现了文人园林的精髓，蕴含着丰富的文化内涵。
@@ -22,25 +22,31 @@ PROMPT_TEMPLATE = """拙政园是江南古典园林的代表作之一，始建
 请以日常、清晰的语气回答。"""
 
 
-def _generate_plan(
+def _messages(
     prior_knowledge: str, duration: str, preferences: list[str] = []
-) -> Generator[str, None, None]:
+) -> list:
     preferences_text = ""
     if preferences:
         preferences_text = f"- 游览偏好：{', '.join(preferences)}"
-    
+
+    return [
+        {
+            "role": "user",
+            "content": PROMPT_TEMPLATE.format(
+                prior_knowledge=prior_knowledge,
+                duration=duration,
+                preferences_text=preferences_text,
+            ),
+        }
+    ]
+
+
+def _generate_plan(
+    prior_knowledge: str, duration: str, preferences: list[str] = []
+) -> Generator[str, None, None]:
     response = utils.ai.chat.completions.create(
         model=config.LANDSCAPE_RECOGNITION_MODEL,
-        messages=[
-            {
-                "role": "user",
-                "content": PROMPT_TEMPLATE.format(
-                    prior_knowledge=prior_knowledge,
-                    duration=duration,
-                    preferences_text=preferences_text,
-                ),
-            }
-        ],
+        messages=_messages(prior_knowledge, duration, preferences),
         temperature=config.MODEL_TEMPERATURE,
         max_tokens=config.MODEL_MAX_TOKENS * 3,
         timeout=config.MODEL_TIMEOUT,
@@ -53,6 +59,24 @@ def _generate_plan(
             yield content
 
 
+async def _generate_plan_async(
+    prior_knowledge: str, duration: str, preferences: list[str] = []
+) -> AsyncGenerator[str, None]:
+    response = await utils.aio.chat.completions.create(
+        model=config.LANDSCAPE_RECOGNITION_MODEL,
+        messages=_messages(prior_knowledge, duration, preferences),
+        temperature=config.MODEL_TEMPERATURE,
+        max_tokens=config.MODEL_MAX_TOKENS * 3,
+        timeout=config.MODEL_TIMEOUT,
+        stream=True,
+    )
+
+    async for chunk in response:
+        content = chunk.choices[0].delta.content
+        if content:
+            yield content
+
+
 def ask():
     prior_knowledge = input(
         "您对拙政园有什么了解？可以随便说说您知道的内容："
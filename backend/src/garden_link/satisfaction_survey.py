@@ -1,4 +1,12 @@
-from . import config, utils
+import os
+import threading
+from functools import cache
+
+import cv2
+
+from . import coalescing, config, utils
+from .facial_fer_model import FacialExpressionRecog
+from .yunet import YuNet
 
 PROMPT = f"""请仔细观察这张图片中的所有人脸。
 1. 识别每个人的表情（例如：非常开心、开心、平静、不开心、非常不开心）。
@@ -13,22 +21,29 @@ PROMPT = f"""请仔细观察这张图片中的所有人脸。
 5. 只输出最终以逗号分隔的整数结果。不要任何额外的文字、解释或标点符号。如果无法识别任何人脸，请只输出：{utils.NULL_TEXT}"""
 
 
-def _analyze_image(base64: str) -> str:
+flights = coalescing.SingleFlight()
+
+
+def _messages(image_url: str) -> list:
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": PROMPT},
+                {
+                    "type": "image_url",
+                    "image_url": {"url": image_url},
+                },
+            ],
+        }
+    ]
+
+
+def _analyze_image(image_url: str) -> str:
     response = (
         utils.ai.chat.completions.create(
             model=config.SATISFACTION_SURVEY_VISUAL_MODEL,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": PROMPT},
-                        {
-                            "type": "image_url",
-                            "image_url": {"url": f"data:image/jpeg;base64,{base64}"},
-                        },
-                    ],
-                }
-            ],
+            messages=_messages(image_url),
             temperature=config.MODEL_TEMPERATURE,
             max_tokens=config.MODEL_MAX_TOKENS,
             timeout=config.MODEL_TIMEOUT,
@@ -41,20 +56,116 @@ def _analyze_image(base64: str) -> str:
     raise utils.UnexpectedResponseError(response)
 
 
-def capture_expressions():
-    frame = utils.take_photo(config.CAMERA_INDEX)
-    base64 = utils.image_to_base64(frame)
-    res = _analyze_image(base64)
+async def _analyze_image_async(image_url: str) -> str:
+    response = (
+        (
+            await utils.aio.chat.completions.create(
+                model=config.SATISFACTION_SURVEY_VISUAL_MODEL,
+                messages=_messages(image_url),
+                temperature=config.MODEL_TEMPERATURE,
+                max_tokens=config.MODEL_MAX_TOKENS,
+                timeout=config.MODEL_TIMEOUT,
+            )
+        )
+        .choices[0]
+        .message
+    )
+    if response.content:
+        return response.content
+    raise utils.UnexpectedResponseError(response)
 
-    scores = []
+
+def _parse_scores(res: str) -> list[int]:
+    """解析视觉模型返回的逗号分隔分数"""
     if res == utils.NULL_TEXT:
-        return
+        return []
+    scores = []
     for r in res.strip().split(","):
         s = r.strip()
-        if s.isdigit():
-            x = int(s)
-            if 1 <= x <= 5:
-                scores.append(str(x))
-        else:
+        if not s.isdigit() or not 1 <= int(s) <= 5:
             raise utils.UnexpectedResponseError(res)
-    print(f"= {'+'.join(scores)}")
+        scores.append(int(s))
+    return scores
+
+
+# FER 模型七类表情对应的满意度分数，顺序同 FacialExpressionRecog.getDesc
+EXPRESSION_SCORES = [
+    1,  # angry
+    1,  # disgust
+    2,  # fearful
+    5,  # happy
+    3,  # neutral
+    2,  # sad
+    4,  # surprised
+]
+
+
+class ExpressionEngine:
+    """本地 CPU 推理：YuNet 检测人脸，MobileFaceNet 识别表情"""
+
+    def __init__(
+        self,
+        detection_model: str = config.FACE_DETECTION_MODEL,
+        expression_model: str = config.FACIAL_EXPRESSION_MODEL,
+    ) -> None:
+        self._detector = YuNet(
+            modelPath=detection_model,
+            confThreshold=config.FACE_DETECTION_THRESHOLD,
+        )
+        self._recognizer = FacialExpressionRecog(modelPath=expression_model)
+        # cv.dnn 的网络对象不能被多个线程同时使用
+        self._lock = threading.Lock()
+
+    def score(self, image: cv2.typing.MatLike) -> list[int]:
+        """返回图中每张人脸的满意度分数（1-5）"""
+        height, width = image.shape[:2]
+        # 在缩小的图像上检测，再把人脸框和关键点映射回原图用于对齐
+        scale = min(1.0, config.FACE_DETECTION_MAX_EDGE / max(width, height))
+        small = cv2.resize(
+            image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+        )
+        with self._lock:
+            self._detector.setInputSize([small.shape[1], small.shape[0]])
+            faces = self._detector.infer(small)
+            labels = self._recognizer.inferBatch(image, faces[:, :-1] / scale)
+        return [EXPRESSION_SCORES[label] for label in labels]
+
+
+@cache
+def _engine() -> ExpressionEngine:
+    return ExpressionEngine()
+
+
+@cache
+def engine() -> str:
+    """实际使用的打分引擎：配置为 local 但缺少模型文件时改用 vlm"""
+    if config.SATISFACTION_SURVEY_ENGINE != "local":
+        return config.SATISFACTION_SURVEY_ENGINE
+    missing = [
+        path
+        for path in (config.FACE_DETECTION_MODEL, config.FACIAL_EXPRESSION_MODEL)
+        if not os.path.exists(path)
+    ]
+    if missing:
+        print(f"缺少本地表情模型 {', '.join(missing)}，满意度调查改用视觉大模型")
+        return "vlm"
+    return "local"
+
+
+def score_faces(image: cv2.typing.MatLike) -> list[int]:
+    """用本地模型为图中每张人脸打分"""
+    return _engine().score(image)
+
+
+def capture_expressions():
+    frame = utils.take_photo(config.CAMERA_INDEX)
+    if engine() == "local":
+        scores = score_faces(frame)
+    else:
+        frame = utils.prepare_image(
+            frame, config.SATISFACTION_IMAGE_MAX_EDGE, config.SATISFACTION_IMAGE_CROP
+        )
+        scores = _parse_scores(_analyze_image(utils.image_to_data_url(frame)))
+
+    if scores:
+        print(f"= {'+'.join(map(str, scores))}")
@@ -0,0 +1,113 @@
+"""基于感知哈希的识别结果缓存
+
+同一观景点前的画面几乎相同，按 64 位 pHash 做近似查找即可复用之前的识别结果。
+查找使用多索引哈希：把哈希切成 8 段，汉明距离不超过 7 的两个哈希至少有一段完全相同，
+因此只需比较与查询哈希共享某一段的候选项。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from . import config
+
+_SEGMENTS = 8
+_SEGMENT_BITS = 64 // _SEGMENTS
+_SEGMENT_MASK = (1 << _SEGMENT_BITS) - 1
+
+
+def perceptual_hash(image: cv2.typing.MatLike) -> int:
+    """计算图像的 64 位 pHash"""
+    small = cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+    low = cv2.dct(gray)[:8, :8]
+    bits = (low > np.median(low)).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _segments(key: int) -> list[int]:
+    return [(key >> (i * _SEGMENT_BITS)) & _SEGMENT_MASK for i in range(_SEGMENTS)]
+
+
+class SceneCache:
+    def __init__(
+        self,
+        capacity: int = config.SCENE_CACHE_SIZE,
+        ttl: float = config.SCENE_CACHE_TTL,
+        max_distance: int = config.SCENE_CACHE_MAX_DISTANCE,
+    ) -> None:
+        if not 0 <= max_distance < _SEGMENTS:
+            raise ValueError(f"汉明距离阈值必须在 0 到 {_SEGMENTS - 1} 之间")
+        self.capacity = capacity
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.hits = 0
+        self.misses = 0
+        # 哈希 -> (过期时间, 流式输出的各个片段)，按最近使用排序
+        self._entries: OrderedDict[int, tuple[float, list[str]]] = OrderedDict()
+        self._index: list[dict[int, set[int]]] = [{} for _ in range(_SEGMENTS)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: int) -> list[str] | None:
+        """查找与 ``key`` 足够接近的缓存结果，未命中时返回 None"""
+        now = time.monotonic()
+        with self._lock:
+            best, best_distance = None, self.max_distance + 1
+            expired = set()
+            for i, segment in enumerate(_segments(key)):
+                for candidate in self._index[i].get(segment, ()):
+                    # 跳过已过期的条目，否则它会挡住距离稍远但仍有效的结果
+                    if self._entries[candidate][0] <= now:
+                        expired.add(candidate)
+                        continue
+                    distance = (candidate ^ key).bit_count()
+                    if distance < best_distance:
+                        best, best_distance = candidate, distance
+            for candidate in expired:
+                self._remove(candidate)
+
+            if best is not None:
+                self._entries.move_to_end(best)
+                self.hits += 1
+                return self._entries[best][1]
+            self.misses += 1
+            return None
+
+    def put(self, key: int, chunks: list[str]) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, chunks)
+            for i, segment in enumerate(_segments(key)):
+                self._index[i].setdefault(segment, set()).add(key)
+            while len(self._entries) > self.capacity:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for bucket in self._index:
+                bucket.clear()
+
+    def _remove(self, key: int) -> None:
+        del self._entries[key]
+        for i, segment in enumerate(_segments(key)):
+            keys = self._index[i][segment]
+            keys.discard(key)
+            if not keys:
+                del self._index[i][segment]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0,
+        }
@@ -0,0 +1,259 @@
+"""门票签发与核验
+
+门票二维码内容为 ``GL1.<票号>.<签名>``，签名是票号的 HMAC-SHA256（截取 16 字节，base64url 编码），
+伪造或篡改的门票无需查库即可拒绝。已签发的票号保存在 SQLite（WAL 模式）中，
+内存中的布隆过滤器先挡掉不在库中的票号；核销用一条带条件的 UPDATE 完成，同一张票只能成功核销一次。
+"""
+
+import base64
+import hashlib
+import hmac
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from functools import cache
+
+import numpy as np
+
+from . import config
+
+_VERSION = "GL1"
+_SIGNATURE_BYTES = 16
+_MASK64 = (1 << 64) - 1
+
+
+class NotConfigured(RuntimeError):
+    """未配置签名密钥或门票库无法打开，检票功能不可用"""
+
+
+@cache
+def _secret() -> bytes:
+    """读取门票签名密钥，未配置时抛出 NotConfigured"""
+    secret = config.TICKET_SECRET
+    if not secret:
+        try:
+            with open(config.TICKET_SECRET_FILE, encoding="utf-8") as f:
+                secret = f.read().strip()
+        except OSError:
+            secret = None
+    if not secret:
+        raise NotConfigured(
+            "未配置门票签名密钥：请设置环境变量 GARDEN_LINK_TICKET_SECRET"
+            f"或写入 {config.TICKET_SECRET_FILE}"
+        )
+    return secret.encode()
+
+
+def _signature(ticket_id: str) -> str:
+    digest = hmac.new(_secret(), ticket_id.encode(), hashlib.sha256).digest()[
+        :_SIGNATURE_BYTES
+    ]
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def sign(ticket_id: str) -> str:
+    """生成门票二维码内容"""
+    if "." in ticket_id:
+        raise ValueError("票号不能包含“.”")
+    return f"{_VERSION}.{ticket_id}.{_signature(ticket_id)}"
+
+
+def verify(payload: str) -> str | None:
+    """校验签名，通过时返回票号，否则返回 None"""
+    parts = payload.strip().split(".")
+    if len(parts) != 3 or parts[0] != _VERSION or not parts[1]:
+        return None
+    ticket_id, signature = parts[1], parts[2]
+    if not hmac.compare_digest(signature, _signature(ticket_id)):
+        return None
+    return ticket_id
+
+
+def _hashes(ticket_id: str) -> tuple[int, int]:
+    digest = hashlib.blake2b(ticket_id.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(
+        digest[8:], "little"
+    ) | 1
+
+
+class BloomFilter:
+    """布隆过滤器：不在集合中的元素绝大多数情况下可直接判定，不会漏判已加入的元素"""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, ticket_id: str) -> list[int]:
+        h1, h2 = _hashes(ticket_id)
+        # 与 update 中的 uint64 运算保持一致，按 64 位回绕
+        return [((h1 + i * h2) & _MASK64) % self.size for i in range(self.hash_count)]
+
+    def add(self, ticket_id: str) -> None:
+        for pos in self._positions(ticket_id):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def update(self, ticket_ids: Iterable[str]) -> None:
+        """批量加入，用于启动时从数据库重建"""
+        hashes = np.array([_hashes(t) for t in ticket_ids], dtype=np.uint64).reshape(
+            -1, 2
+        )
+        if not len(hashes):
+            return
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        positions = (hashes[:, :1] + steps * hashes[:, 1:]) % np.uint64(self.size)
+        positions = positions.ravel()
+        bits = np.frombuffer(self._bits, dtype=np.uint8)
+        np.bitwise_or.at(
+            bits,
+            (positions >> np.uint64(3)).astype(np.intp),
+            (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)),
+        )
+
+    def __contains__(self, ticket_id: str) -> bool:
+        bits = self._bits
+        return all(
+            bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(ticket_id)
+        )
+
+
+class TicketStore:
+    def __init__(
+        self,
+        path: str = config.TICKET_DATABASE,
+        capacity: int = config.TICKET_BLOOM_CAPACITY,
+        error_rate: float = config.TICKET_BLOOM_ERROR_RATE,
+    ) -> None:
+        # 没有密钥时无法签发和核验，直接拒绝打开
+        _secret()
+        try:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(
+                path, check_same_thread=False, isolation_level=None
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except (OSError, sqlite3.Error) as e:
+            raise NotConfigured(f"无法打开门票库 {path}：{e}") from e
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # 后端和 legacy 检票进程共用同一个库，写冲突时等待而不是立即报错
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tickets ("
+            "id TEXT PRIMARY KEY, issued_at REAL NOT NULL, consumed_at REAL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS tickets_issued_at ON tickets (issued_at)"
+        )
+        self._lock = threading.Lock()
+        self.bloom = BloomFilter(capacity, error_rate)
+        self._synced_at = 0.0  # 布隆过滤器已包含此时间之前签发的门票
+        self._sync()
+
+    def _sync(self) -> None:
+        """把其他进程新签发的门票加入布隆过滤器"""
+        since = self._synced_at
+        rows = self._conn.execute(
+            "SELECT id, issued_at FROM tickets WHERE issued_at >= ?", (since,)
+        ).fetchall()
+        self.bloom.update(row[0] for row in rows)
+        # 同一时刻签发的门票可能尚未提交，下次从该时刻起重新读取
+        self._synced_at = max((row[1] for row in rows), default=since)
+
+    def issue(self, ticket_ids: Iterable[str]) -> list[str]:
+        """签发一批门票，返回对应的二维码内容"""
+        ticket_ids = list(ticket_ids)
+        payloads = [sign(t) for t in ticket_ids]
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO tickets (id, issued_at) VALUES (?, ?)",
+                    ((t, now) for t in ticket_ids),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.bloom.update(ticket_ids)
+        return payloads
+
+    def validate(self, payload: str, consume: bool = True) -> tuple[bool, str]:
+        """核验门票，返回 (是否有效, 原因)
+
+        原因为 "ok"、"invalid"（签名错误）、"unknown"（未签发）或 "used"（已核销）。
+        ``consume`` 为真时核验通过即核销。
+        """
+        ticket_id = verify(payload)
+        if ticket_id is None:
+            return False, "invalid"
+        if ticket_id not in self.bloom:
+            # 可能是另一个进程刚签发的门票，增量同步后再判断
+            with self._lock:
+                self._sync()
+            if ticket_id not in self.bloom:
+                return False, "unknown"
+
+        with self._lock:
+            if consume:
+                cursor = self._conn.execute(
+                    "UPDATE tickets SET consumed_at = ? WHERE id = ? AND consumed_at IS NULL",
+                    (time.time(), ticket_id),
+                )
+                if cursor.rowcount == 1:
+                    return True, "ok"
+            row = self._conn.execute(
+                "SELECT consumed_at FROM tickets WHERE id = ?", (ticket_id,)
+            ).fetchone()
+        if row is None:
+            return False, "unknown"
+        if row[0] is not None:
+            return False, "used"
+        return True, "ok"
+
+    def stats(self) -> dict:
+        with self._lock:
+            issued, consumed = self._conn.execute(
+                "SELECT COUNT(*), COUNT(consumed_at) FROM tickets"
+            ).fetchone()
+        return {"issued": issued, "consumed": consumed}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: TicketStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> TicketStore:
+    """获取（并在需要时打开）门票库，检票不可用时抛出 NotConfigured"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TicketStore()
+        return _store
+
+
+def shutdown() -> None:
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m garden_link.tickets <前缀> <数量>：签发门票并逐行输出二维码内容
+    prefix, count = sys.argv[1], int(sys.argv[2])
+    for payload in get_store().issue(f"{prefix}-{i:06d}" for i in range(count)):
+        print(payload)
+    shutdown()
@@ -1,16 +1,35 @@
-import base64
-from io import BytesIO
+import binascii
+import threading
+from functools import cache
 import cv2
-from PIL import Image
-from . import config
+import httpx
+from . import camera, config
 import openai
 
 
 NULL_TEXT = "Ø"
 
+DATA_URL_PREFIX = b"data:image/jpeg;base64,"
+
+# 每个线程复用一块以 DATA_URL_PREFIX 开头的缓冲区拼接图片 URL，按需增长
+_data_url_buffers = threading.local()
+
 
 ai = openai.OpenAI(base_url=config.LM_STUDIO_URL, api_key="")
 
+# 供 FastAPI 接口使用的异步客户端，共享一个保持长连接的连接池
+aio = openai.AsyncOpenAI(
+    base_url=config.LM_STUDIO_URL,
+    api_key="",
+    http_client=openai.DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+    ),
+)
+
 
 class UnexpectedResponseError(Exception):
     def __init__(self, response: object) -> None:
@@ -18,20 +37,116 @@ class UnexpectedResponseError(Exception):
 
 
 def take_photo(camera_index=config.CAMERA_INDEX):
-    cap = cv2.VideoCapture(camera_index)
-    if not cap.isOpened():
-        raise RuntimeError("无法打开摄像头")
-    ret, frame = cap.read()
-    cap.release()
+    return camera.get_service(camera_index).latest()
+
+
+@cache
+def _face_cascade() -> cv2.CascadeClassifier:
+    return cv2.CascadeClassifier(
+        cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+    )
+
+
+def _center_roi(width: int, height: int) -> tuple[int, int, int, int]:
+    w = int(width * config.IMAGE_CENTER_CROP_RATIO)
+    h = int(height * config.IMAGE_CENTER_CROP_RATIO)
+    return (width - w) // 2, (height - h) // 2, w, h
+
+
+def _face_roi(image: cv2.typing.MatLike) -> tuple[int, int, int, int] | None:
+    """返回包含所有人脸（含外扩边距）的最小矩形，未检测到人脸时返回 None"""
+    height, width = image.shape[:2]
+    # 在缩小的灰度图上检测，避免高分辨率下检测过慢
+    scale = min(1.0, 640 / max(width, height))
+    small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    faces = _face_cascade().detectMultiScale(gray, 1.2, 3, minSize=(24, 24))
+    if len(faces) == 0:
+        return None
+
+    x0, y0, x1, y1 = width, height, 0, 0
+    for x, y, w, h in faces:
+        margin = max(w, h) * config.IMAGE_FACE_MARGIN
+        x0 = min(x0, int((x - margin) / scale))
+        y0 = min(y0, int((y - margin) / scale))
+        x1 = max(x1, int((x + w + margin) / scale))
+        y1 = max(y1, int((y + h + margin) / scale))
+    x0, y0 = max(0, x0), max(0, y0)
+    x1, y1 = min(width, x1), min(height, y1)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def prepare_image(
+    image: cv2.typing.MatLike,
+    max_edge: int | None = None,
+    crop: str | None = None,
+) -> cv2.typing.MatLike:
+    """按策略裁剪并缩放图像，使宽高对齐到视觉模型的 patch 大小
+
+    :param max_edge: 缩放后最长边的上限，None 表示保持原分辨率（仍会对齐）
+    :param crop: ``None``、``"center"`` 或 ``"face"``，未检测到人脸时不裁剪
+    """
+    height, width = image.shape[:2]
+    match crop:
+        case None:
+            roi = None
+        case "center":
+            roi = _center_roi(width, height)
+        case "face":
+            roi = _face_roi(image)
+        case _:
+            raise ValueError(f"未知的裁剪方式：{crop}")
+    if roi is not None:
+        x, y, width, height = roi
+        image = image[y : y + height, x : x + width]
+
+    scale = 1.0
+    if max_edge is not None:
+        scale = min(1.0, max_edge / max(width, height))
+    # 与模型端的 smart resize 一样四舍五入到 patch 的整数倍，避免服务端再次缩放
+    patch = config.VLM_PATCH_SIZE
+    target_w = max(patch, round(width * scale / patch) * patch)
+    target_h = max(patch, round(height * scale / patch) * patch)
+    if (target_w, target_h) == (width, height):
+        return image
+    return cv2.resize(image, (target_w, target_h), interpolation=cv2.INTER_AREA)
+
+
+def estimate_image_tokens(image: cv2.typing.MatLike) -> int:
+    """估算图像在视觉模型中占用的 token 数"""
+    height, width = image.shape[:2]
+    patch = config.VLM_PATCH_SIZE
+    return max(1, round(width / patch)) * max(1, round(height / patch))
+
+
+def encode_jpeg(image: cv2.typing.MatLike) -> memoryview:
+    """直接将 OpenCV 的 BGR 图像编码为 JPEG，返回编码结果的字节视图，不做复制"""
+    ret, jpeg = cv2.imencode(
+        ".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, config.IMAGE_QUALITY]
+    )
     if not ret:
-        raise RuntimeError("无法读取摄像头图像")
-    return frame
+        raise RuntimeError("无法编码图像")
+    return memoryview(jpeg).cast("B")
 
 
 def image_to_base64(image: cv2.typing.MatLike) -> str:
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    pil_image = Image.fromarray(image_rgb)
-    buffered = BytesIO()
-    pil_image.save(buffered, format="JPEG", quality=config.IMAGE_QUALITY)
-    img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-    return img_base64
+    return binascii.b2a_base64(encode_jpeg(image), newline=False).decode("ascii")
+
+
+def image_to_data_url(image: cv2.typing.MatLike) -> str:
+    """生成 ``data:image/jpeg;base64,...`` 形式的图片 URL
+
+    base64 结果写入线程复用的预分配缓冲区，紧跟在前缀之后，不再为拼接前缀复制一次，
+    最后直接从缓冲区构造字符串。标准库没有把 base64 编码到已有缓冲区的接口，
+    b2a_base64 的输出仍是一次分配。
+    """
+    encoded = binascii.b2a_base64(encode_jpeg(image), newline=False)
+    start = len(DATA_URL_PREFIX)
+    size = start + len(encoded)
+    buffer = getattr(_data_url_buffers, "buffer", None)
+    if buffer is None or len(buffer) < size:
+        buffer = bytearray(DATA_URL_PREFIX) + bytearray(size - start)
+        _data_url_buffers.buffer = buffer
+    buffer[start:size] = encoded
+    with memoryview(buffer) as view:
+        return str(view[:size], "ascii")
@@ -0,0 +1,83 @@
+"""图像编码性能测试
+
+对比旧的 cvtColor → PIL → BytesIO → base64 流程与新的 ``utils.image_to_data_url``，
+统计每帧耗时与 Python 侧分配的内存。未安装 Pillow 时跳过旧实现，只测新实现。
+在 backend 目录下运行：
+
+    python -m tests.bench_image_encoding
+"""
+
+import base64
+import time
+import tracemalloc
+from io import BytesIO
+
+import cv2
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from src.garden_link import config, utils
+
+RESOLUTIONS = [(640, 480), (1920, 1080)]
+ROUNDS = 50
+
+
+def legacy_data_url(image: cv2.typing.MatLike) -> str:
+    """旧实现：六次整帧复制"""
+    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    pil_image = Image.fromarray(image_rgb)
+    buffered = BytesIO()
+    pil_image.save(buffered, format="JPEG", quality=config.IMAGE_QUALITY)
+    img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+    return f"data:image/jpeg;base64,{img_base64}"
+
+
+def make_frame(width: int, height: int) -> np.ndarray:
+    """生成带纹理的测试帧，避免纯色图像让 JPEG 编码过快"""
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(frame, (9, 9), 0)
+
+
+def measure(func, frame) -> tuple[float, int]:
+    """返回每帧平均耗时（微秒）与单次调用的峰值分配（字节）"""
+    func(frame)  # 预热
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(frame)
+    elapsed = (time.perf_counter() - start) / ROUNDS * 1e6
+
+    tracemalloc.start()
+    func(frame)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench():
+    print("=" * 60)
+    print("图像编码性能测试")
+    print("=" * 60)
+    implementations = [("新实现", utils.image_to_data_url)]
+    if Image is None:
+        print("未安装 Pillow，跳过旧实现\n")
+    else:
+        implementations.insert(0, ("旧实现", legacy_data_url))
+        print("注意：PIL 内部缓冲区不经过 tracemalloc，旧实现的分配量偏低\n")
+
+    for width, height in RESOLUTIONS:
+        frame = make_frame(width, height)
+        print(f"{width}x{height}:")
+        for name, func in implementations:
+            elapsed, peak = measure(func, frame)
+            print(f"  {name}：{elapsed:10.1f} µs/帧，峰值分配 {peak / 1024:8.1f} KiB")
+        print()
+
+
+if __name__ == "__main__":
+    bench()
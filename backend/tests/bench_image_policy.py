@@ -0,0 +1,136 @@
+"""图像缩放策略测试
+
+对每组（最长边, 裁剪方式）设置统计图像 token 数、首 token 延迟（TTFT），
+以及回答与原分辨率回答是否一致。默认启动一个本地桩服务器：它按图像 token
+数模拟预填充耗时，并按检测到的人脸数量给出满意度格式的回答，因此缩放
+导致人脸丢失时会表现为回答不一致。也可用 ``--base-url`` 指向真实的 LM Studio。
+在 backend 目录下运行：
+
+    python -m tests.bench_image_policy [--image 图片路径] [--base-url URL]
+"""
+
+import argparse
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import openai
+
+from src.garden_link import config, satisfaction_survey, utils
+
+MAX_EDGES = [None, 1280, 1024, 896, 640, 448]
+CROPS = [None, "center", "face"]
+PREFILL_MS_PER_TOKEN = 0.5  # 桩服务器模拟的预填充速度
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """模拟 OpenAI 兼容的流式 chat completions 接口"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        image = None
+        for part in body["messages"][0]["content"]:
+            if part["type"] == "image_url":
+                data = part["image_url"]["url"].split(",", 1)[1]
+                buffer = np.frombuffer(base64.b64decode(data), dtype=np.uint8)
+                image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+        tokens = utils.estimate_image_tokens(image)
+        time.sleep(tokens * PREFILL_MS_PER_TOKEN / 1000)
+        faces = utils._face_cascade().detectMultiScale(
+            cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), 1.2, 3, minSize=(24, 24)
+        )
+        answer = ",".join(["3"] * len(faces)) if len(faces) else utils.NULL_TEXT
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for content, finish_reason in [(answer, None), ("", "stop")]:
+            chunk = {
+                "id": "stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"content": content} if content else {},
+                        "finish_reason": finish_reason,
+                    }
+                ],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def start_stub_server() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/v1"
+
+
+def ask(client: openai.OpenAI, image_url: str) -> tuple[float, str]:
+    """返回首 token 延迟（毫秒）与完整回答"""
+    start = time.perf_counter()
+    ttft = None
+    answer = ""
+    response = client.chat.completions.create(
+        model=config.SATISFACTION_SURVEY_VISUAL_MODEL,
+        messages=satisfaction_survey._messages(image_url),
+        temperature=0,
+        max_tokens=config.MODEL_MAX_TOKENS,
+        timeout=config.MODEL_TIMEOUT,
+        stream=True,
+    )
+    for chunk in response:
+        content = chunk.choices[0].delta.content
+        if content:
+            if ttft is None:
+                ttft = (time.perf_counter() - start) * 1000
+            answer += content
+    return ttft or 0.0, answer.strip()
+
+
+def bench(frame: cv2.typing.MatLike, base_url: str):
+    client = openai.OpenAI(base_url=base_url, api_key="")
+    height, width = frame.shape[:2]
+    print(f"原始图像：{width}x{height}\n")
+    print(f"{'最长边':>6} {'裁剪':>6} {'尺寸':>10} {'token':>6} {'TTFT(ms)':>9}  一致")
+
+    reference = None
+    for crop in CROPS:
+        for max_edge in MAX_EDGES:
+            image = utils.prepare_image(frame, max_edge, crop)
+            ttft, answer = ask(client, utils.image_to_data_url(image))
+            if reference is None:
+                reference = answer
+            size = f"{image.shape[1]}x{image.shape[0]}"
+            agree = "✓" if answer == reference else f"✗ ({answer})"
+            print(
+                f"{max_edge!s:>6} {crop!s:>6} {size:>10} "
+                f"{utils.estimate_image_tokens(image):>6} {ttft:>9.1f}  {agree}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="图像缩放策略测试")
+    parser.add_argument("--image", help="测试图片路径，省略时从摄像头拍摄")
+    parser.add_argument("--base-url", help="模型服务地址，省略时使用本地桩服务器")
+    args = parser.parse_args()
+
+    if args.image:
+        frame = cv2.imread(args.image)
+    else:
+        frame = utils.take_photo(config.CAMERA_INDEX)
+
+    print("=" * 60)
+    print("图像缩放策略测试")
+    print("=" * 60)
+    bench(frame, args.base_url or start_stub_server())
@@ -0,0 +1,76 @@
+"""门票核验性能测试
+
+在临时数据库中签发 100 万张门票，分别统计有效票（首次核销）、重复核销、未签发和伪造门票的
+每秒核验次数，以及重启时从数据库重建布隆过滤器的耗时。在 backend 目录下运行：
+
+    python -m tests.bench_ticket_store
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from src.garden_link import config, tickets
+
+TICKET_COUNT = 1_000_000
+BATCH_SIZE = 100_000
+ROUNDS = 20_000
+
+
+def rate(func, payloads: list[str]) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        func(payload)
+    return len(payloads) / (time.perf_counter() - start)
+
+
+def bench():
+    print("=" * 60)
+    print(f"门票核验性能测试（{TICKET_COUNT:,} 张）")
+    print("=" * 60)
+
+    # 测试用的临时库不需要正式密钥
+    config.TICKET_SECRET = config.TICKET_SECRET or "bench"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tickets.db")
+        store = tickets.TicketStore(path, capacity=TICKET_COUNT)
+
+        start = time.perf_counter()
+        payloads: list[str] = []
+        for offset in range(0, TICKET_COUNT, BATCH_SIZE):
+            payloads += store.issue(
+                f"T{i:07d}" for i in range(offset, offset + BATCH_SIZE)
+            )
+        print(f"签发：{time.perf_counter() - start:.1f} 秒")
+
+        store.close()
+        start = time.perf_counter()
+        store = tickets.TicketStore(path, capacity=TICKET_COUNT)
+        print(f"重新打开并重建布隆过滤器：{time.perf_counter() - start:.1f} 秒\n")
+
+        sample = random.Random(0).sample(payloads, ROUNDS)
+        unknown = [tickets.sign(f"X{i:07d}") for i in range(ROUNDS)]
+        forged = [p[:-4] + "AAAA" for p in sample]
+
+        cases = [
+            ("有效票（核销）", store.validate, sample),
+            ("重复核销", store.validate, sample),
+            ("未签发", store.validate, unknown),
+            ("伪造签名", store.validate, forged),
+            ("仅校验签名", tickets.verify, sample),
+        ]
+        for name, func, data in cases:
+            print(f"  {name}：{rate(func, data):10.0f} 次/秒")
+
+        false_positives = sum(
+            t in store.bloom for t in (f"X{i:07d}" for i in range(ROUNDS))
+        )
+        print(f"\n布隆过滤器误判率：{false_positives / ROUNDS:.4%}")
+        print(store.stats())
+        store.close()
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,138 @@
+"""推理槽位准入控制测试
+
+在 backend 目录下运行：python -m pytest tests/test_admission.py
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.garden_link import __main__ as server
+from src.garden_link import admission, plan_customizing
+from src.garden_link.admission import AdmissionScheduler, Overloaded, Priority
+
+
+def make_scheduler(timeout: float = 1.0) -> AdmissionScheduler:
+    return AdmissionScheduler(
+        max_concurrency=1, queue_timeouts=dict.fromkeys(Priority, timeout)
+    )
+
+
+def test_priority_order():
+    async def main() -> list[Priority]:
+        scheduler = make_scheduler()
+        holder = await scheduler.acquire(Priority.PLAN)
+        order = []
+
+        async def wait(priority: Priority) -> None:
+            slot = await scheduler.acquire(priority)
+            order.append(priority)
+            slot.release()
+
+        # 按优先级从低到高排队，出队顺序应与排队顺序相反
+        tasks = []
+        for priority in (Priority.PLAN, Priority.LANDSCAPE, Priority.SURVEY):
+            tasks.append(asyncio.create_task(wait(priority)))
+            await asyncio.sleep(0)
+        holder.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(main()) == [Priority.SURVEY, Priority.LANDSCAPE, Priority.PLAN]
+
+
+def test_queue_timeout():
+    async def main() -> None:
+        scheduler = make_scheduler(timeout=0.05)
+        holder = await scheduler.acquire(Priority.SURVEY)
+        with pytest.raises(Overloaded) as e:
+            await scheduler.acquire(Priority.SURVEY)
+        assert e.value.retry_after >= 1
+        assert scheduler.rejected[Priority.SURVEY] == 1
+        holder.release()
+        assert not scheduler._running
+
+    asyncio.run(main())
+
+
+def test_queue_timeout_returns_503(monkeypatch):
+    scheduler = make_scheduler(timeout=0.05)
+    monkeypatch.setattr(admission, "scheduler", scheduler)
+    holder = asyncio.run(scheduler.acquire(Priority.SURVEY))
+
+    client = TestClient(server.app)
+    response = client.post(
+        "/api/plan-customizing",
+        json={"prior_knowledge": "", "duration": "1 小时", "preferences": []},
+    )
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    holder.release()
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def main() -> None:
+        scheduler = make_scheduler()
+        holder = await scheduler.acquire(Priority.PLAN)
+        waiter = asyncio.create_task(scheduler.acquire(Priority.PLAN))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        holder.release()
+        assert not scheduler._running
+        (await scheduler.acquire(Priority.PLAN)).release()
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_passes_on_handed_over_slot():
+    async def main() -> None:
+        scheduler = make_scheduler()
+        holder = await scheduler.acquire(Priority.PLAN)
+        waiter = asyncio.create_task(scheduler.acquire(Priority.PLAN))
+        await asyncio.sleep(0)
+        # 槽位已交给等待者，但它在恢复执行前被取消
+        holder.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert not scheduler._running
+
+    asyncio.run(main())
+
+
+def test_plan_stream_releases_slot_on_disconnect(monkeypatch):
+    scheduler = make_scheduler()
+    monkeypatch.setattr(admission, "scheduler", scheduler)
+
+    async def endless_plan(*args):
+        while True:
+            yield "计划"
+            await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(plan_customizing, "_generate_plan_async", endless_plan)
+
+    async def main() -> None:
+        request = server.PlanCustomizingRequest(prior_knowledge="", duration="1 小时")
+        response = await server.customize_plan(request)
+        assert len(scheduler._running) == 1
+
+        disconnected = asyncio.Event()
+
+        async def receive() -> dict:
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            # 收到第一段内容后客户端断开
+            if message.get("body"):
+                disconnected.set()
+
+        await asyncio.wait_for(
+            response({"type": "http", "method": "POST"}, receive, send), 1
+        )
+        assert not scheduler._running
+
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""并发请求合并测试
+
+在 backend 目录下运行：python -m pytest tests/test_coalescing.py
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from src.garden_link.coalescing import SingleFlight
+
+CHUNKS = ["春", "夏", "秋", "冬"]
+
+
+class Source:
+    """按需放出片段的流式调用，记录被发起的次数"""
+
+    def __init__(self) -> None:
+        self.starts = 0
+        self.released = asyncio.Semaphore(0)
+
+    async def start(self) -> AsyncIterator[str]:
+        self.starts += 1
+        return self._chunks()
+
+    async def _chunks(self) -> AsyncIterator[str]:
+        for chunk in CHUNKS:
+            await self.released.acquire()
+            yield chunk
+
+    def release(self, count: int = 1) -> None:
+        for _ in range(count):
+            self.released.release()
+
+
+async def collect(chunks: AsyncIterator[str]) -> list[str]:
+    return [chunk async for chunk in chunks]
+
+
+def test_joiner_replays_from_first_chunk():
+    async def main() -> None:
+        flights = SingleFlight(window=10)
+        source = Source()
+        first = await flights.stream("key", source.start)
+        source.release(2)
+        assert [await anext(first), await anext(first)] == CHUNKS[:2]
+
+        # 前两个片段已经读出后才加入，仍从第一个片段开始
+        second = await flights.stream("key", source.start)
+        source.release(2)
+        assert await collect(second) == CHUNKS
+        assert await collect(first) == CHUNKS[2:]
+        assert source.starts == 1
+        assert flights.stats()["shared"] == 1
+
+    asyncio.run(main())
+
+
+def test_prepare_error_reaches_all_waiters():
+    async def main() -> None:
+        flights = SingleFlight(window=10)
+        starts = 0
+
+        async def start() -> AsyncIterator[str]:
+            nonlocal starts
+            starts += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("无法读取摄像头图像")
+
+        results = await asyncio.gather(
+            *(flights.stream("key", start) for _ in range(3)), return_exceptions=True
+        )
+        assert starts == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    asyncio.run(main())
+
+
+def test_stream_error_reaches_all_waiters():
+    async def main() -> None:
+        flights = SingleFlight(window=10)
+
+        async def chunks() -> AsyncIterator[str]:
+            yield CHUNKS[0]
+            raise RuntimeError("连接中断")
+
+        async def start() -> AsyncIterator[str]:
+            return chunks()
+
+        for replay in [await flights.stream("key", start) for _ in range(2)]:
+            with pytest.raises(RuntimeError):
+                await collect(replay)
+
+    asyncio.run(main())
+
+
+def test_leader_disconnect_does_not_cut_off_others():
+    async def main() -> None:
+        flights = SingleFlight(window=10)
+        source = Source()
+        leader = await flights.stream("key", source.start)
+        other = await flights.stream("key", source.start)
+
+        source.release()
+        assert await anext(leader) == CHUNKS[0]
+        # 发起调用的客户端断开
+        await leader.aclose()
+
+        source.release(len(CHUNKS) - 1)
+        assert await collect(other) == CHUNKS
+
+    asyncio.run(main())
+
+
+def test_finished_flights_are_evicted():
+    async def main() -> None:
+        flights = SingleFlight(window=0.05)
+        source = Source()
+        source.release(len(CHUNKS))
+        assert await collect(await flights.stream("stream", source.start)) == CHUNKS
+
+        async def answer() -> int:
+            return 42
+
+        assert await flights.call("call", answer) == 42
+        # 时间窗口内仍保留，供随后到达的请求加入
+        assert set(flights._flights) == {"stream", "call"}
+        await asyncio.sleep(0.1)
+        assert not flights._flights
+
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+"""门票核验接口测试
+
+在 backend 目录下运行：python -m pytest tests/test_tickets.py
+"""
+
+from fastapi.testclient import TestClient
+
+from src.garden_link import __main__ as server
+from src.garden_link import config, tickets
+
+
+def use_secret(monkeypatch, tmp_path, secret: str | None) -> None:
+    tickets.shutdown()
+    tickets._secret.cache_clear()
+    monkeypatch.setattr(config, "TICKET_SECRET", secret)
+    monkeypatch.setattr(config, "TICKET_SECRET_FILE", str(tmp_path / "secret"))
+
+
+def test_missing_secret_only_disables_ticketing(monkeypatch, tmp_path):
+    use_secret(monkeypatch, tmp_path, None)
+    monkeypatch.setattr(server.camera, "get_service", lambda index: None)
+    with TestClient(server.app) as client:
+        assert client.get("/").status_code == 200
+        response = client.post("/api/ticket-validation", json={"code": "GL1.a.b"})
+        assert response.status_code == 503
+        assert client.get("/api/ticket-validation/stats").status_code == 503
+
+
+def test_validation_consumes_once(monkeypatch, tmp_path):
+    use_secret(monkeypatch, tmp_path, "secret")
+    store = tickets.TicketStore(str(tmp_path / "data" / "tickets.db"), 1000, 0.01)
+    monkeypatch.setattr(tickets, "_store", store)
+    payload = store.issue(["T-1"])[0]
+
+    client = TestClient(server.app)
+    first = client.post("/api/ticket-validation", json={"code": payload}).json()
+    second = client.post("/api/ticket-validation", json={"code": payload}).json()
+    assert first == {"valid": True, "reason": "ok"}
+    assert second == {"valid": False, "reason": "used"}
+    tickets.shutdown()
+    tickets._secret.cache_clear()
@@ -108,3 +108,28 @@ export async function analyzeSatisfaction(): Promise<SatisfactionResult> {
 
   return await response.json();
 }
+
+/**
+ * 门票核验 - 校验二维码签名并核销门票，同一张票只能核销一次
+ */
+export interface TicketValidationResult {
+  valid: boolean
+  reason: 'ok' | 'invalid' | 'unknown' | 'used'
+}
+
+export async function validateTicket(code: string): Promise<TicketValidationResult> {
+  const response = await fetch(`${API_BASE_URL}/api/ticket-validation`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ code }),
+  });
+
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({ detail: '请求失败' }));
+    throw new Error(error.detail || '门票核验失败');
+  }
+
+  return await response.json();
+}
@@ -1,15 +1,30 @@
+import type { TicketValidationResult } from './api';
 import jsQR from 'jsqr-es6';
 import { readonly, ref } from 'vue';
+import { validateTicket } from './api';
 
 interface UseQRScannerOptions {
-  correctCode?: string
+  validate?: (code: string) => Promise<TicketValidationResult>
 }
 
+export interface ScannedTicket {
+  code: string
+  valid: boolean
+  message: string
+}
+
+const REASON_MESSAGES: Record<TicketValidationResult['reason'], string> = {
+  ok: '有效门票',
+  invalid: '无效门票',
+  unknown: '门票未签发',
+  used: '门票已使用',
+};
+
 export function useQRScanner(options: UseQRScannerOptions = {}) {
-  const { correctCode = '114514' } = options;
+  const { validate = validateTicket } = options;
 
   const isScanning = ref(false);
-  const scannedCodes = ref<string[]>([]);
+  const scannedCodes = ref<ScannedTicket[]>([]);
   const lastScannedCode = ref<string | null>(null);
   const scanStatus = ref<'idle' | 'scanning' | 'success' | 'error'>('idle');
   const statusMessage = ref<string>('就绪');
@@ -20,6 +35,24 @@ export function useQRScanner(options: UseQRScannerOptions = {}) {
   let lastScanTime = 0;
   const SCAN_DEBOUNCE_MS = 500; // 500ms 内重复扫描同一个码视为一次
 
+  // 门票在服务端核验并核销，不阻塞扫描循环
+  async function checkTicket(code: string) {
+    statusMessage.value = `正在核验：${code}`;
+    let ticket: ScannedTicket;
+    try {
+      const { valid, reason } = await validate(code);
+      ticket = { code, valid, message: REASON_MESSAGES[reason] ?? '无效门票' };
+    } catch (error) {
+      ticket = { code, valid: false, message: `核验失败：${(error as Error).message}` };
+    }
+
+    scanStatus.value = ticket.valid ? 'success' : 'error';
+    statusMessage.value = `${ticket.valid ? '✓' : '✗'} ${ticket.message}：${code}`;
+
+    // 添加到扫描历史
+    scannedCodes.value.push(ticket);
+  }
+
   async function startScanning(videoElement: HTMLVideoElement) {
     try {
       if (isScanning.value) {
@@ -88,23 +121,13 @@ export function useQRScanner(options: UseQRScannerOptions = {}) {
             const scannedValue = code.data.trim();
             const now = Date.now();
 
-            // 防止重复扫描：同一个码在 500ms 内重复出现视为一次
-            if (
-              lastScannedCode.value !== scannedValue
-              || now - lastScanTime > SCAN_DEBOUNCE_MS
-            ) {
-              lastScanTime = now;
+            // 防止重复扫描：同一个码持续出现视为一次，离开画面 500ms 后才会再次核验
+            const isRepeat = lastScannedCode.value === scannedValue
+              && now - lastScanTime <= SCAN_DEBOUNCE_MS;
+            lastScanTime = now;
+            if (!isRepeat) {
               lastScannedCode.value = scannedValue;
-
-              // 验证码是否正确
-              const isValid = scannedValue === correctCode;
-              scanStatus.value = isValid ? 'success' : 'error';
-              statusMessage.value = isValid
-                ? `✓ 有效门票：${scannedValue}`
-                : `✗ 无效门票：${scannedValue}`;
-
-              // 添加到扫描历史
-              scannedCodes.value.push(scannedValue);
+              checkTicket(scannedValue);
             }
           }
         } catch (error) {
@@ -9,161 +9,72 @@ import socket
 import atexit
 import sys
 import importlib
-import cv2
-import numpy as np
 
 print("=== 初始化系统核心组件 ===")
 
 app = Flask(__name__)
 
-# 全局摄像头配置
-def setup_camera():
-    """设置摄像头参数以避免 VIDIOC_QBUF: Invalid argument 错误"""
-    try:
-        # 尝试不同的摄像头配置
-        camera_configs = [
-            {'index': 0, 'api': cv2.CAP_V4L2},
-            {'index': 0, 'api': cv2.CAP_ANY},
-            {'index': 1, 'api': cv2.CAP_V4L2},
-            {'index': 1, 'api': cv2.CAP_ANY}
-        ]
-        
-        for config in camera_configs:
-            try:
-                cap = cv2.VideoCapture(config['index'], config['api'])
-                if cap.isOpened():
-                    # 设置摄像头参数
-                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                    cap.set(cv2.CAP_PROP_FPS, 30)
-                    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-                    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # 减少缓冲区大小
-                    
-                    # 测试读取一帧
-                    ret, frame = cap.read()
-                    if ret and frame is not None:
-                        print(f"✓ 摄像头 {config['index']} 初始化成功")
-                        return cap
-                    else:
-                        cap.release()
-            except Exception as e:
-                print(f"摄像头 {config['index']} 初始化失败: {e}")
-                continue
-        
-        print("✗ 所有摄像头初始化失败，使用模拟模式")
-        return None
-        
-    except Exception as e:
-        print(f"摄像头设置失败: {e}")
-        return None
+# 共享摄像头的 MJPEG 直通模式：视频流直接转发摄像头原生 JPEG，省去解码和重新编码，
+# 但画面上不再叠加检测框和状态文字；摄像头不支持时自动回退到解码模式
+CAMERA_MJPEG_PASSTHROUGH = False
 
-# 初始化全局摄像头
-global_camera = setup_camera()
+# 无摄像头时的模拟画面来源：默认为合成渐变画面，设为录制视频的路径后按原帧率循环播放，
+# 可在演示机或压测时用真实画面驱动人脸/二维码检测流程
+SIMULATION_VIDEO = None
 
-# 导入其他功能模块
-try:
-    from scripts.led_controller import LEDController
-    LED_AVAILABLE = True
-    print("✓ LED控制器导入成功")
-except ImportError as e:
-    print(f"✗ LED模块导入失败: {e}")
-    LED_AVAILABLE = False
-except Exception as e:
-    print(f"✗ LED初始化错误: {e}")
-    LED_AVAILABLE = False
-
-print("\n=== 初始化智能播报系统 ===")
-BROADCAST_AVAILABLE = False
-smart_broadcast_instance = None
-
-try:
-    # 直接导入SmartBroadcast类
+# 各子系统登记到注册表：服务启动后在后台并行初始化，接口首次用到时若尚未就绪只等待该子系统
+from scripts.component_registry import ComponentRegistry
+components = ComponentRegistry()
+
+def setup_camera():
+    """配置共享摄像头并探测其支持的模式，需在检票和播报首次打开摄像头之前完成
+
+    所有模块都通过 camera_manager 使用同一个摄像头，这里不单独打开设备。
+    """
+    from scripts.camera_manager import camera_manager
+    camera_manager.mjpeg_passthrough = CAMERA_MJPEG_PASSTHROUGH
+    if SIMULATION_VIDEO:
+        from scripts.frame_source import VideoFileSource
+        camera_manager.simulation_source_factory = lambda: VideoFileSource(SIMULATION_VIDEO)
+    camera_manager.probe()
+    return camera_manager
+
+def create_smart_broadcast():
+    components.get('camera')
     from scripts.smart_broadcast import SmartBroadcast
-    
-    # 创建实例
-    smart_broadcast_instance = SmartBroadcast()
-    print(f"✓ SmartBroadcast 实例创建成功: {type(smart_broadcast_instance)}")
+    instance = SmartBroadcast()
+    print(f"✓ SmartBroadcast 实例创建成功: {type(instance)}")
     
     # 检查必要方法
     required_methods = ['get_frame_bytes', 'capture_image', 'start_monitoring', 'get_status']
-    missing_methods = []
+    missing_methods = [method for method in required_methods if not hasattr(instance, method)]
+    if missing_methods:
+        raise RuntimeError(f"缺少必要方法: {missing_methods}")
     
-    for method in required_methods:
-        if hasattr(smart_broadcast_instance, method):
-            print(f"✓ 方法 {method} 存在")
-        else:
-            print(f"✗ 方法 {method} 不存在")
-            missing_methods.append(method)
-    
-    if not missing_methods:
-        BROADCAST_AVAILABLE = True
-        # 启动监控
-        smart_broadcast_instance.start_monitoring()
-        print("✓ 智能播报系统启动成功")
-    else:
-        print(f"✗ 缺少必要方法: {missing_methods}")
-        BROADCAST_AVAILABLE = False
-        
-except Exception as e:
-    print(f"✗ 智能播报系统初始化失败: {e}")
-    import traceback
-    traceback.print_exc()
-    BROADCAST_AVAILABLE = False
-
-# 检票模块
-try:
+    # 启动监控
+    instance.start_monitoring()
+    return instance
+
+def create_ticket_checker():
+    components.get('camera')
     from scripts.ticket_checker import TicketChecker
-    TICKET_CHECKER_AVAILABLE = True
-    print("✓ 检票模块导入成功")
-except ImportError as e:
-    print(f"✗ 检票模块导入失败: {e}")
-    TICKET_CHECKER_AVAILABLE = False
-except Exception as e:
-    print(f"✗ 检票模块初始化错误: {e}")
-    TICKET_CHECKER_AVAILABLE = False
-
-# 初始化检票系统
-ticket_checker = None
-if TICKET_CHECKER_AVAILABLE:
-    try:
-        ticket_checker = TicketChecker()
-        ticket_checker.start_monitoring()
-        print("✓ 智能检票系统初始化成功")
-    except Exception as e:
-        print(f"✗ 智能检票系统初始化失败: {e}")
-        TICKET_CHECKER_AVAILABLE = False
+    instance = TicketChecker()
+    instance.start_monitoring()
+    return instance
 
-# 温湿度模块
-try:
+def create_temp_sensor():
     from scripts.temperature_humidity import TemperatureHumiditySensor
-    TEMP_SENSOR_AVAILABLE = True
-    print("✓ 温湿度模块导入成功")
-except ImportError as e:
-    print(f"✗ 温湿度模块导入失败: {e}")
-    TEMP_SENSOR_AVAILABLE = False
-except Exception as e:
-    print(f"✗ 温湿度初始化错误: {e}")
-    TEMP_SENSOR_AVAILABLE = False
-
-# 初始化温湿度传感器
-temp_sensor = None
-if TEMP_SENSOR_AVAILABLE:
-    try:
-        temp_sensor = TemperatureHumiditySensor(gpio_pin=12)
-        print("✓ 温湿度传感器初始化成功")
-    except Exception as e:
-        print(f"✗ 温湿度传感器初始化失败: {e}")
-        TEMP_SENSOR_AVAILABLE = False
+    return TemperatureHumiditySensor(gpio_pin=12)
 
-# 初始化LED控制器
-led_controller = None
-if LED_AVAILABLE:
-    try:
-        led_controller = LEDController()
-        print("✓ LED控制器初始化成功")
-    except Exception as e:
-        print(f"✗ LED控制器初始化失败: {e}")
-        LED_AVAILABLE = False
+def create_led_controller():
+    from scripts.led_controller import LEDController
+    return LEDController()
+
+components.register('camera', setup_camera)
+components.register('smart_broadcast', create_smart_broadcast, cleanup=lambda instance: instance.cleanup())
+components.register('ticket_checker', create_ticket_checker, cleanup=lambda instance: instance.stop_monitoring())
+components.register('temp_sensor', create_temp_sensor, cleanup=lambda instance: instance.cleanup())
+components.register('led', create_led_controller, cleanup=lambda instance: instance.cleanup())
 
 # System state variables
 system_states = {
@@ -197,23 +108,10 @@ def kill_port(port):
         except:
             pass
 
-# 摄像头清理函数
-def cleanup_camera():
-    """清理摄像头资源"""
-    if global_camera is not None:
-        global_camera.release()
-        print("摄像头资源已释放")
-
 # 全局清理函数
 def cleanup():
     """Cleanup resources"""
-    cleanup_camera()
-    if LED_AVAILABLE and led_controller:
-        led_controller.cleanup()
-    if BROADCAST_AVAILABLE and smart_broadcast_instance:
-        smart_broadcast_instance.cleanup()
-    if TICKET_CHECKER_AVAILABLE and ticket_checker:
-        ticket_checker.stop_monitoring()
+    components.cleanup()
     print("Backend service stopped")
 
 atexit.register(cleanup)
@@ -226,15 +124,19 @@ def index():
 @app.route('/health')
 def health_check():
     """Health check interface"""
+    # 只查看已就绪的子系统，健康检查不会触发初始化或等待
+    camera = components.peek('camera')
     return jsonify({
         "status": "healthy",
         "timestamp": time.time(),
-        "camera_available": global_camera is not None,
-        "broadcast_available": BROADCAST_AVAILABLE,
-        "broadcast_type": str(type(smart_broadcast_instance)),
-        "ticket_checker_available": TICKET_CHECKER_AVAILABLE,
-        "led_available": LED_AVAILABLE,
-        "temp_sensor_available": TEMP_SENSOR_AVAILABLE
+        "camera_available": bool(camera and (camera.camera_available or camera.capabilities)),
+        "camera_mode": camera.mode if camera else None,
+        "broadcast_available": components.peek('smart_broadcast') is not None,
+        "broadcast_type": str(type(components.peek('smart_broadcast'))),
+        "ticket_checker_available": components.peek('ticket_checker') is not None,
+        "led_available": components.peek('led') is not None,
+        "temp_sensor_available": components.peek('temp_sensor') is not None,
+        "components": components.status()
     })
 
 @app.route('/smart_lighting')
@@ -271,54 +173,19 @@ def smart_broadcast_page():
 @app.route('/video_feed')
 def video_feed():
     """视频流API - 检票系统"""
-    if not TICKET_CHECKER_AVAILABLE:
+    ticket_checker = components.get('ticket_checker')
+    if ticket_checker is None:
         return "检票系统不可用", 404
 
-    def generate_frames():
-        frame_count = 0
-        last_time = time.time()
-        error_count = 0
-        
-        while True:
-            try:
-                frame_bytes = ticket_checker.get_frame_bytes()
-                if frame_bytes:
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-                    
-                    frame_count += 1
-                    current_time = time.time()
-                    if current_time - last_time >= 1.0:
-                        fps = frame_count / (current_time - last_time)
-                        if frame_count % 30 == 0:
-                            print(f"检票视频流FPS: {fps:.1f}")
-                        frame_count = 0
-                        last_time = current_time
-                    
-                    time.sleep(0.033)  # ~30fps
-                    error_count = 0  # 重置错误计数
-                else:
-                    error_count += 1
-                    if error_count > 10:
-                        print("连续获取空帧，可能摄像头出现问题")
-                    time.sleep(0.1)
-                    
-            except Exception as e:
-                print(f"检票视频流错误: {e}")
-                error_count += 1
-                if error_count > 5:
-                    print("视频流严重错误，尝试恢复...")
-                    time.sleep(1)
-                else:
-                    time.sleep(0.5)
-
-    return Response(generate_frames(),
+    # 每帧只编码一次，所有客户端共享同一份 JPEG，有新帧时才唤醒
+    return Response(ticket_checker.frame_broadcaster.stream(),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/api/led/control', methods=['POST'])
 def control_led():
     """Control LED strip API"""
-    if not LED_AVAILABLE:
+    led_controller = components.get('led')
+    if led_controller is None:
         return jsonify({"status": "error", "message": "LED function unavailable"})
     data = request.json
     action = data.get('action')
@@ -341,7 +208,8 @@ def control_led():
 @app.route('/api/led/status')
 def get_led_status():
     """Get LED status"""
-    if not LED_AVAILABLE:
+    led_controller = components.get('led')
+    if led_controller is None:
         return jsonify({"status": "unavailable"})
     return jsonify({
         "status": "running" if led_controller.is_running else "stopped",
@@ -391,7 +259,8 @@ def update_state():
         system_states[system_name] = state
         print(f"System {system_name} state updated to: {state}")
         # Special handling: smart lighting system
-        if system_name == "smart_lighting" and LED_AVAILABLE:
+        led_controller = components.get('led') if system_name == "smart_lighting" else None
+        if led_controller is not None:
             if state:
                 led_controller.start_animation()
             else:
@@ -403,7 +272,8 @@ def update_state():
 @app.route('/api/led/set_brightness', methods=['POST'])
 def set_led_brightness():
     """Set LED brightness API"""
-    if not LED_AVAILABLE:
+    led_controller = components.get('led')
+    if led_controller is None:
         return jsonify({"status": "error", "message": "LED function unavailable"})
     data = request.json
     brightness = data.get('brightness')
@@ -419,7 +289,8 @@ def set_led_brightness():
 @app.route('/api/environment/status')
 def get_environment_status():
     """获取环境状态API"""
-    if not TEMP_SENSOR_AVAILABLE:
+    temp_sensor = components.get('temp_sensor')
+    if temp_sensor is None:
         return jsonify({"status": "error", "message": "温湿度传感器不可用"})
     try:
         status = temp_sensor.get_status()
@@ -433,7 +304,8 @@ def get_environment_status():
 @app.route('/api/environment/recommendations')
 def get_environment_recommendations():
     """获取环境调节建议API"""
-    if not TEMP_SENSOR_AVAILABLE:
+    temp_sensor = components.get('temp_sensor')
+    if temp_sensor is None:
         return jsonify({"status": "error", "message": "温湿度传感器不可用"})
     try:
         recommendations = temp_sensor.get_recommendations()
@@ -446,10 +318,32 @@ def get_environment_recommendations():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)})
 
+@app.route('/api/environment/history')
+def get_environment_history():
+    """获取温湿度历史API
+
+    参数：start、end 为 Unix 时间戳（默认最近 1 小时），resolution 为 0（原始样本）、1、60 或 3600 秒，
+    不指定时自动选择
+    """
+    temp_sensor = components.get('temp_sensor')
+    if temp_sensor is None:
+        return jsonify({"status": "error", "message": "温湿度传感器不可用"})
+    try:
+        end = request.args.get('end', default=time.time(), type=float)
+        start = request.args.get('start', default=end - 3600, type=float)
+        resolution = request.args.get('resolution', type=int)
+        return jsonify({
+            "status": "success",
+            "data": temp_sensor.history.query(start, end, resolution)
+        })
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)})
+
 @app.route('/api/ticket/status')
 def get_ticket_status():
     """获取检票状态API"""
-    if not TICKET_CHECKER_AVAILABLE:
+    ticket_checker = components.get('ticket_checker')
+    if ticket_checker is None:
         return jsonify({"status": "error", "message": "检票系统不可用"})
     try:
         status = ticket_checker.get_status()
@@ -463,7 +357,8 @@ def get_ticket_status():
 @app.route('/api/ticket/start')
 def start_ticket_checking():
     """开始检票监控API"""
-    if not TICKET_CHECKER_AVAILABLE:
+    ticket_checker = components.get('ticket_checker')
+    if ticket_checker is None:
         return jsonify({"status": "error", "message": "检票系统不可用"})
     try:
         ticket_checker.start_monitoring()
@@ -474,7 +369,8 @@ def start_ticket_checking():
 @app.route('/api/ticket/stop')
 def stop_ticket_checking():
     """停止检票监控API"""
-    if not TICKET_CHECKER_AVAILABLE:
+    ticket_checker = components.get('ticket_checker')
+    if ticket_checker is None:
         return jsonify({"status": "error", "message": "检票系统不可用"})
     try:
         ticket_checker.stop_monitoring()
@@ -485,7 +381,8 @@ def stop_ticket_checking():
 @app.route('/api/broadcast/status')
 def get_broadcast_status():
     """获取语音解说状态API"""
-    if not BROADCAST_AVAILABLE or smart_broadcast_instance is None:
+    smart_broadcast_instance = components.get('smart_broadcast')
+    if smart_broadcast_instance is None:
         return jsonify({"status": "error", "message": "语音解说系统不可用"})
     try:
         status = smart_broadcast_instance.get_status()
@@ -499,7 +396,8 @@ def get_broadcast_status():
 @app.route('/api/broadcast/capture', methods=['POST'])
 def capture_broadcast_image():
     """拍摄图片API"""
-    if not BROADCAST_AVAILABLE or smart_broadcast_instance is None:
+    smart_broadcast_instance = components.get('smart_broadcast')
+    if smart_broadcast_instance is None:
         return jsonify({"status": "error", "message": "语音解说系统不可用"})
     try:
         success, message = smart_broadcast_instance.capture_image()
@@ -513,68 +411,22 @@ def capture_broadcast_image():
 @app.route('/broadcast_video_feed')
 def broadcast_video_feed():
     """语音解说视频流API"""
-    print(f"接收到视频流请求 - 播报模块状态: {BROADCAST_AVAILABLE}")
+    smart_broadcast_instance = components.get('smart_broadcast')
+    print(f"接收到视频流请求 - 播报模块状态: {smart_broadcast_instance is not None}")
     print(f"智能播报对象类型: {type(smart_broadcast_instance)}")
     
-    if not BROADCAST_AVAILABLE or smart_broadcast_instance is None:
+    if smart_broadcast_instance is None:
         print("语音解说系统不可用")
         return "语音解说系统不可用", 404
 
-    def generate_frames():
-        print("开始生成语音解说视频流...")
-        frame_count = 0
-        last_time = time.time()
-        error_count = 0
-        
-        while True:
-            try:
-                if smart_broadcast_instance is None:
-                    print("smart_broadcast_instance对象为None")
-                    time.sleep(1)
-                    continue
-                    
-                if not hasattr(smart_broadcast_instance, 'get_frame_bytes'):
-                    print("smart_broadcast_instance没有get_frame_bytes方法")
-                    time.sleep(1)
-                    continue
-                
-                frame_bytes = smart_broadcast_instance.get_frame_bytes()
-                if frame_bytes:
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-                    
-                    frame_count += 1
-                    current_time = time.time()
-                    if current_time - last_time >= 2.0:
-                        fps = frame_count / (current_time - last_time)
-                        print(f"播报视频流FPS: {fps:.1f}")
-                        frame_count = 0
-                        last_time = current_time
-                    
-                    time.sleep(0.033)
-                    error_count = 0
-                else:
-                    error_count += 1
-                    if error_count > 5:
-                        print("连续获取空帧")
-                    time.sleep(0.1)
-                    
-            except Exception as e:
-                print(f"语音解说视频流错误: {e}")
-                error_count += 1
-                if "VIDIOC_QBUF" in str(e):
-                    print("检测到摄像头缓冲区错误，尝试短暂休息")
-                    time.sleep(0.5)
-                else:
-                    time.sleep(0.1)
-
-    return Response(generate_frames(),
+    return Response(smart_broadcast_instance.frame_broadcaster.stream(),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/api/led/set_chase_length', methods=['POST'])
 def set_led_chase_length():
     """Set LED chase length API"""
-    if not LED_AVAILABLE:
+    led_controller = components.get('led')
+    if led_controller is None:
         return jsonify({"status": "error", "message": "LED function unavailable"})
     data = request.json
     length = data.get('length')
@@ -587,19 +439,36 @@ def set_led_chase_length():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)})
 
+@app.route('/api/led/set_animation', methods=['POST'])
+def set_led_animation():
+    """Set LED animation API (chase, breathing or gradient)"""
+    led_controller = components.get('led')
+    if led_controller is None:
+        return jsonify({"status": "error", "message": "LED function unavailable"})
+    data = request.json
+    animation = data.get('animation')
+    try:
+        if animation is not None:
+            led_controller.set_animation(animation)
+            return jsonify({"status": "success", "message": f"Animation set to {animation}"})
+        else:
+            return jsonify({"status": "error", "message": "Animation parameter required"})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)})
+
 def start_backend():
     """Start backend service"""
-    # Kill processes using port 5000
-    print("Checking port usage...")
-    kill_port(5000)
-    time.sleep(2)
+    # Kill processes using port 5000, only waiting as long as the port stays busy
+    if is_port_in_use(5000):
+        print("Port 5000 in use, stopping previous instance...")
+        kill_port(5000)
+        deadline = time.time() + 2
+        while is_port_in_use(5000) and time.time() < deadline:
+            time.sleep(0.05)
     
+    # Subsystems initialise in the background; component status is reported on /health
     print("Smart Park Backend Service starting...")
-    print(f"Camera status: {'Available' if global_camera else 'Unavailable'}")
-    print(f"LED status: {'Available' if LED_AVAILABLE else 'Unavailable'}")
-    print(f"Broadcast status: {'Available' if BROADCAST_AVAILABLE else 'Unavailable'}")
-    print(f"Ticket checker status: {'Available' if TICKET_CHECKER_AVAILABLE else 'Unavailable'}")
-    print(f"Temperature sensor status: {'Available' if TEMP_SENSOR_AVAILABLE else 'Unavailable'}")
+    components.start_all()
 
     # Start Flask application
     try:
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""MJPEG 直通模式 CPU 占用测试
+
+分别以三种方式从摄像头取流并统计 CPU 占用（单核百分比）：
+  1. 解码 + 每个客户端各编码一次（旧实现）
+  2. 解码 + 每帧只编码一次（MJPEGBroadcaster）
+  3. MJPEG 直通，不解码也不编码
+建议在树莓派上运行：python3 bench_mjpeg_passthrough.py --streams 1 2 4
+"""
+
+import argparse
+import time
+
+import cv2
+
+
+def open_camera(index, passthrough):
+    cap = cv2.VideoCapture(index, cv2.CAP_V4L2)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    cap.set(cv2.CAP_PROP_FPS, 30)
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    if passthrough:
+        cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        cap.set(cv2.CAP_PROP_FORMAT, -1)
+    return cap
+
+
+def run(index, seconds, passthrough, encodes_per_frame):
+    cap = open_camera(index, passthrough)
+    if not cap.isOpened():
+        print("✗ 无法打开摄像头")
+        return None
+
+    ret, frame = cap.read()
+    if passthrough and (not ret or frame.ndim == 3):
+        print("✗ 摄像头不支持 MJPEG 直通")
+        cap.release()
+        return None
+
+    frames = 0
+    wall_start = time.time()
+    cpu_start = time.process_time()
+    while time.time() - wall_start < seconds:
+        ret, frame = cap.read()
+        if not ret:
+            continue
+        if passthrough:
+            jpeg = frame.reshape(-1).tobytes()
+        else:
+            for _ in range(encodes_per_frame):
+                ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        frames += 1
+    wall = time.time() - wall_start
+    cpu = time.process_time() - cpu_start
+    cap.release()
+    return frames / wall, cpu / wall * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MJPEG 直通模式 CPU 占用测试")
+    parser.add_argument('--camera', type=int, default=0, help='摄像头索引')
+    parser.add_argument('--seconds', type=float, default=10, help='每项测试时长（秒）')
+    parser.add_argument('--streams', type=int, nargs='+', default=[1, 2, 4], help='模拟的客户端数量')
+    args = parser.parse_args()
+
+    print("=== MJPEG 直通模式 CPU 占用测试 ===")
+    for streams in args.streams:
+        print(f"\n客户端数量: {streams}")
+        cases = [
+            ("解码 + 每客户端编码", False, streams),
+            ("解码 + 单次编码", False, 1),
+            ("MJPEG 直通", True, 0),
+        ]
+        for name, passthrough, encodes in cases:
+            result = run(args.camera, args.seconds, passthrough, encodes)
+            if result is not None:
+                fps, cpu = result
+                print(f"  {name:<12} {fps:5.1f} fps  CPU {cpu:5.1f}%")
+
+
+if __name__ == '__main__':
+    main()
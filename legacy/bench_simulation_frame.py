@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""模拟画面生成与检测流程压测
+
+1. 对比逐行循环生成渐变画面（旧实现）与 SyntheticSource 的帧率
+2. 指定 --video 时，用录制视频以最快速度驱动 TicketChecker 的检测流程，统计每秒处理帧数
+在 legacy 目录下运行：python3 bench_simulation_frame.py [--video gate.mp4]
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from scripts.frame_source import SyntheticSource, VideoFileSource
+
+
+def legacy_frame(count, width=640, height=480):
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    for i in range(height):
+        frame[i, :, 0] = int(128 + 127 * np.sin(i / 50 + count / 30))
+        frame[i, :, 1] = int(128 + 127 * np.sin(i / 40 + count / 25))
+        frame[i, :, 2] = int(128 + 127 * np.sin(i / 60 + count / 35))
+    cv2.putText(frame, "模拟摄像头模式", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    cv2.putText(frame, f"帧: {count}", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    return frame
+
+
+def measure(func, frames):
+    start = time.perf_counter()
+    for i in range(1, frames + 1):
+        func(i)
+    return frames / (time.perf_counter() - start)
+
+
+def bench_pipeline(path, frames):
+    from scripts.ticket_checker import TicketChecker
+
+    source = VideoFileSource(path, realtime=False)
+    checker = TicketChecker()
+    # 压测时让检票流程一直处于二维码识别阶段，人脸和二维码检测都会运行
+    checker.checking_state = "FACE_DETECTED"
+    checker.face_detection_time = time.time() + 1e6
+    start = time.perf_counter()
+    for _ in range(frames):
+        checker.process_single_frame(source.read())
+    elapsed = time.perf_counter() - start
+    source.close()
+    print(f"  TicketChecker 检测流程：{frames / elapsed:6.1f} fps")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟画面生成与检测流程压测")
+    parser.add_argument('--frames', type=int, default=300, help='每项测试的帧数')
+    parser.add_argument('--video', help='用于驱动检测流程的录制视频')
+    args = parser.parse_args()
+
+    print("=== 模拟画面生成 ===")
+    source = SyntheticSource()
+    print(f"  逐行循环：      {measure(legacy_frame, args.frames):8.1f} fps")
+    print(f"  SyntheticSource：{measure(lambda i: source.read(), args.frames):8.1f} fps")
+
+    if args.video:
+        print("\n=== 检测流程压测 ===")
+        bench_pipeline(args.video, args.frames)
+
+
+if __name__ == '__main__':
+    main()
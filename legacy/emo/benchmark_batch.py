@@ -0,0 +1,60 @@
+import argparse
+import time
+
+import numpy as np
+import cv2 as cv
+
+from facial_fer_model import FacialExpressionRecog, FaceAlignment
+
+parser = argparse.ArgumentParser(description='Per-face vs batched facial expression recognition benchmark')
+parser.add_argument('--model', '-m', type=str, default='./facial_expression_recognition_mobilefacenet_2022july.onnx',
+                    help='Path to the facial expression recognition model.')
+parser.add_argument('--faces', '-f', type=int, nargs='+', default=[1, 8, 32],
+                    help='Face counts to benchmark.')
+parser.add_argument('--rounds', '-r', type=int, default=20,
+                    help='Timed rounds per face count.')
+args = parser.parse_args()
+
+
+def synthetic_faces(n, cell=160):
+    """Lay out n fake faces on a grid and return the image and YuNet-style (n, 14) boxes."""
+    cols = int(np.ceil(np.sqrt(n)))
+    rows = int(np.ceil(n / cols))
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (rows * cell, cols * cell, 3), dtype=np.uint8)
+
+    std_points = FaceAlignment()._std_points
+    bboxes = np.zeros((n, 14), dtype=np.float32)
+    for i in range(n):
+        x, y = (i % cols) * cell + 24, (i // cols) * cell + 24
+        landmarks = std_points + (x, y) + rng.normal(0, 1.5, std_points.shape)
+        bboxes[i, :4] = (x, y, 112, 112)
+        bboxes[i, 4:] = landmarks.ravel()
+    return image, bboxes
+
+
+def per_face(model, image, bboxes):
+    fer_res = np.zeros(0, dtype=np.int8)
+    for bbox in bboxes:
+        fer_res = np.concatenate((fer_res, model.infer(image, bbox)), axis=0)
+    return fer_res
+
+
+def timed(func, *func_args):
+    func(*func_args)  # warm up
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        result = func(*func_args)
+    return (time.perf_counter() - start) / args.rounds * 1000, result
+
+
+if __name__ == '__main__':
+    model = FacialExpressionRecog(modelPath=args.model)
+
+    print('%6s %14s %14s %9s %7s' % ('faces', 'per-face (ms)', 'batched (ms)', 'speedup', 'agree'))
+    for n in args.faces:
+        image, bboxes = synthetic_faces(n)
+        loop_ms, loop_res = timed(per_face, model, image, bboxes)
+        batch_ms, batch_res = timed(model.inferBatch, image, bboxes)
+        agree = np.array_equal(loop_res.astype(np.uint8), batch_res)
+        print('%6d %14.2f %14.2f %8.1fx %7s' % (n, loop_ms, batch_ms, loop_ms / batch_ms, agree))
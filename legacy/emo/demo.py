@@ -76,9 +76,7 @@ def process(detect_model, fer_model, frame):
     if dets is None:
         return False, None, None
 
-    fer_res = np.zeros(0, dtype=np.int8)
-    for face_points in dets:
-        fer_res = np.concatenate((fer_res, fer_model.infer(frame, face_points[:-1])), axis=0)
+    fer_res = fer_model.inferBatch(frame, dets[:, :-1])
     return True, dets, fer_res
 
 
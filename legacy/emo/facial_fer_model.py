@@ -24,6 +24,8 @@ class FacialExpressionRecog:
         self._inputSize = [112, 112]
         self._mean = np.array([0.5, 0.5, 0.5])[np.newaxis, np.newaxis, :]
         self._std = np.array([0.5, 0.5, 0.5])[np.newaxis, np.newaxis, :]
+        # Reused N x 3 x H x W input tensor for batched inference, grown on demand
+        self._batchBlob = np.empty((0, 3, self._inputSize[1], self._inputSize[0]), dtype=np.float32)
 
     @property
     def name(self):
@@ -57,6 +59,39 @@ class FacialExpressionRecog:
 
         return results
 
+    def _preprocessBatch(self, image, bboxes):
+        n = len(bboxes)
+        if self._batchBlob.shape[0] < n:
+            self._batchBlob = np.empty((n, 3, self._inputSize[1], self._inputSize[0]), dtype=np.float32)
+        blob = self._batchBlob[:n]
+        tfms = self._align_model.get_similarity_transforms_for_cv2(bboxes[:, 4:].reshape(n, -1, 2))
+        for i, tfm in enumerate(tfms):
+            aligned = cv.warpAffine(image, tfm, (112, 112))
+            # BGR HWC -> RGB CHW, written straight into the batch tensor
+            blob[i] = aligned[:, :, ::-1].transpose(2, 0, 1)
+        # Same normalisation as _preprocess: (x / 255 - mean) / std with mean = std = 0.5
+        blob *= 2.0 / 255.0
+        blob -= 1.0
+        return blob
+
+    def inferBatch(self, image, bboxes):
+        """Classify all faces of one image with a single forward pass.
+
+        bboxes is an (N, 14) array of YuNet boxes and landmarks; returns N labels.
+        """
+        if len(bboxes) == 0:
+            return np.zeros(0, dtype=np.uint8)
+
+        # Preprocess
+        inputBlob = self._preprocessBatch(image, bboxes)
+
+        # Forward
+        self._model.setInput(inputBlob, self._inputNames)
+        outputBlob = self._model.forward(self._outputNames)
+
+        # Postprocess
+        return self._postprocess(outputBlob)
+
     def _postprocess(self, outputBlob):
         result = np.argmax(outputBlob[0], axis=1).astype(np.uint8)
         return result
@@ -110,7 +145,7 @@ class FaceAlignment():
             # print(r, X, U, sep="\n")
             r = np.squeeze(r)
         else:
-            raise Exception("cp2tform:twoUniquePointsReq")
+            raise ValueError("cp2tform:twoUniquePointsReq")
 
         sc = r[0]
         ss = r[1]
@@ -136,7 +171,7 @@ class FaceAlignment():
         xyR = xy
         xyR[:, 0] = -1 * xyR[:, 0]
         # Solve for trans2
-        trans2r, trans2r_inv = self.__findNonreflectiveSimilarity(uv, xyR, options)
+        trans2r, _trans2r_inv = self.__findNonreflectiveSimilarity(uv, xyR, options)
 
         # manually reflect the tform to undo the reflection done on xyR
         TreflectY = np.array([[-1, 0, 0], [0, 1, 0], [0, 0, 1]])
@@ -166,11 +201,45 @@ class FaceAlignment():
         return cv2_trans
 
     def get_similarity_transform_for_cv2(self, src_pts, dst_pts):
-        trans, trans_inv = self.__get_similarity_transform(src_pts, dst_pts)
+        trans, _trans_inv = self.__get_similarity_transform(src_pts, dst_pts)
         cv2_trans = self.__cvt_tform_mat_for_cv2(trans)
         return cv2_trans, trans
 
+    def get_similarity_transforms_for_cv2(self, lm5_points):
+        """Closed-form non-reflective similarity for a whole batch of landmark sets.
+
+        Solves the same least-squares problem as __findNonreflectiveSimilarity
+        (fit std points -> landmarks, then invert), so results match it, but with
+        sums over an (N, 5, 2) array instead of a per-face lstsq. Returns (N, 2, 3)
+        matrices mapping landmarks onto the standard points, ready for cv.warpAffine.
+        """
+        uv = np.asarray(lm5_points, dtype=np.float64)
+        xy = self._std_points
+        xy_mean = xy.mean(axis=0)
+        uv_mean = uv.mean(axis=1)
+        p = xy - xy_mean
+        q = uv - uv_mean[:, np.newaxis, :]
+
+        # uv = [[sc, ss], [-ss, sc]] @ xy + t
+        norm = np.sum(p * p)
+        sc = np.einsum('nkd,kd->n', q, p) / norm
+        ss = (np.einsum('nk,k->n', q[:, :, 0], p[:, 1]) - np.einsum('nk,k->n', q[:, :, 1], p[:, 0])) / norm
+
+        # Invert analytically: the inverse of [[sc, ss], [-ss, sc]] is [[sc, -ss], [ss, sc]] / (sc^2 + ss^2)
+        det = np.maximum(sc * sc + ss * ss, np.finfo(np.float64).tiny)
+        tfms = np.empty((uv.shape[0], 2, 3))
+        tfms[:, 0, 0] = sc / det
+        tfms[:, 0, 1] = -ss / det
+        tfms[:, 1, 0] = ss / det
+        tfms[:, 1, 1] = sc / det
+        # Translation maps the landmark centroid onto the standard centroid
+        tfms[:, :, 2] = xy_mean - np.einsum('nij,nj->ni', tfms[:, :, :2], uv_mean)
+        return tfms
+
     def get_align_image(self, image, lm5_points):
         assert lm5_points is not None
-        tfm, trans = self.get_similarity_transform_for_cv2(lm5_points, self._std_points)
+        if self.reflective:
+            tfm, _trans = self.get_similarity_transform_for_cv2(lm5_points, self._std_points)
+        else:
+            tfm = self.get_similarity_transforms_for_cv2(lm5_points[np.newaxis])[0]
         return cv.warpAffine(image, tfm, (112, 112))
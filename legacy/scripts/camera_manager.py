@@ -4,6 +4,11 @@
 import cv2
 import numpy as np
 import subprocess
+import threading
+import time
+from scripts.mjpeg_broadcaster import MJPEGBroadcaster
+from scripts.frame_source import SyntheticSource
+from scripts import camera_probe
 
 class CameraManager:
     _instance = None
@@ -21,83 +26,287 @@ class CameraManager:
             self._users = 0
             self.camera_index = 1  # 默认使用摄像头1
             self.camera_available = False
-            self.simulation_frame_count = 0
+            
+            # 摄像头能力只探测一次（结果缓存到磁盘），按所有使用者的需求选择开销最小的模式
+            self.camera_order = [1, 0, 2]
+            self.capabilities = None  # 设备编号 -> 支持的模式列表
+            self._probe_lock = threading.Lock()
+            self._requirements = {}  # 使用者 -> (宽, 高, 帧率)
+            self.mode = None  # 当前使用的模式
+            
+            # 模拟模式的画面来源，可替换为 VideoFileSource 用录制的视频驱动检测流程
+            self.simulation_source_factory = SyntheticSource
+            self._simulation_source = None
+            
+            # 帧总线：唯一的采集线程发布带序号的最新帧，各订阅者按序号等待新帧
+            self._lock = threading.Lock()
+            self._frame_cond = threading.Condition()
+            self._frame_seq = 0
+            self._latest_frame = None
+            self._capture_thread = None
+            self._capturing = False
+            # 每次启动采集加一；停止时未能及时退出的旧线程据此得知自己已过期，不再读设备、发布帧
+            self._capture_generation = 0
+            
+            # MJPEG 直通：保留摄像头原生的 JPEG 数据直接推流，只在需要像素时才解码
+            self.mjpeg_passthrough = False  # 需在首次 get_camera 前设置
+            self.passthrough_active = False
+            self._latest_jpeg = None
+            self._decode_lock = threading.Lock()
+            self._decoded = {}  # reduced -> (序号, 解码后的帧)
+            self.raw_broadcaster = MJPEGBroadcaster()
             print("CameraManager 单例初始化完成")
     
-    def get_camera(self):
-        if self._camera is None:
-            self._camera = self._initialize_camera()
-        self._users += 1
-        print(f"摄像头用户数: {self._users}")
-        return self._camera
-    
-    def release_camera(self):
-        self._users -= 1
-        print(f"摄像头用户数: {self._users}")
-        if self._users <= 0 and self._camera is not None:
-            print("释放摄像头资源")
-            self._camera.release()
-            self._camera = None
+    def get_camera(self, consumer=None, width=640, height=480, fps=15):
+        """登记使用者及其所需的最低分辨率和帧率，返回共享摄像头（不可用时返回 None）
+
+        已打开的模式不能满足新的需求时，以满足所有使用者的模式重新打开。
+        """
+        with self._lock:
+            self._requirements[consumer] = (width, height, fps)
+            if self._camera is not None and not self._mode_satisfies(self.mode):
+                print("当前摄像头模式不满足新的需求，重新打开")
+                self._stop_capture()
+                self._camera.release()
+                self._camera = None
+            if self._camera is None:
+                self._camera = self._initialize_camera()
+            if self._camera is not None and not self._capturing:
+                self._start_capture()
+            self._users += 1
+            print(f"摄像头用户数: {self._users}")
+            return self._camera
+    
+    def release_camera(self, consumer=None):
+        with self._lock:
+            self._requirements.pop(consumer, None)
+            self._users -= 1
+            print(f"摄像头用户数: {self._users}")
+            if self._users <= 0 and self._camera is not None:
+                print("释放摄像头资源")
+                self._stop_capture()
+                self._camera.release()
+                self._camera = None
+                self.mode = None
+    
+    def probe(self):
+        """探测（或从缓存读取）各摄像头支持的模式，只执行一次"""
+        with self._probe_lock:
+            if self.capabilities is None:
+                indexes = camera_probe.device_indexes()
+                ordered = [i for i in self.camera_order if i in indexes]
+                self.capabilities = camera_probe.load_capabilities(ordered)
+            return self.capabilities
+    
+    def requirement(self):
+        """所有使用者需求的合集：(宽, 高, 帧率)"""
+        if not self._requirements:
+            return 640, 480, 15
+        return tuple(max(values) for values in zip(*self._requirements.values()))
+    
+    def _mode_satisfies(self, mode):
+        if mode is None:
+            return True  # 未经探测打开的摄像头无从比较，沿用
+        width, height, fps = self.requirement()
+        return mode["width"] >= width and mode["height"] >= height and mode["fps"] >= fps
+    
+    def _start_capture(self):
+        self._capturing = True
+        self._capture_generation += 1
+        self._capture_thread = threading.Thread(target=self._capture_loop,
+                                                args=(self._camera, self._capture_generation))
+        self._capture_thread.daemon = True
+        self._capture_thread.start()
+    
+    def _stop_capture(self):
+        self._capturing = False
+        with self._frame_cond:
+            self._frame_cond.notify_all()
+        if self._capture_thread is not None:
+            self._capture_thread.join(timeout=1.0)
+            self._capture_thread = None
+        self.raw_broadcaster.close()
+    
+    def _current(self, generation):
+        return self._capturing and self._capture_generation == generation
+    
+    def _capture_loop(self, camera, generation):
+        """唯一读取摄像头的线程，避免多个模块同时读设备"""
+        while self._current(generation):
+            try:
+                ret, frame = camera.read()
+            except Exception as e:
+                print(f"摄像头读取错误: {e}")
+                ret, frame = False, None
+            
+            if not ret or frame is None:
+                time.sleep(0.05)
+                continue
+            
+            if self.passthrough_active:
+                # 直通模式下读到的是一维 JPEG 数据，像素在订阅者需要时才解码
+                jpeg = frame.reshape(-1)
+                with self._frame_cond:
+                    # 读取期间可能已停止或重新启动采集，过期的线程不再发布
+                    if not self._current(generation):
+                        break
+                    self.raw_broadcaster.publish_jpeg(jpeg)
+                    self._frame_seq += 1
+                    self._latest_jpeg = jpeg
+                    self._latest_frame = None
+                    self._frame_cond.notify_all()
+                continue
+            
+            # 发布的帧由所有订阅者共享，设为只读，需要绘制的订阅者自行复制
+            frame.flags.writeable = False
+            with self._frame_cond:
+                if not self._current(generation):
+                    break
+                self._frame_seq += 1
+                self._latest_frame = frame
+                self._frame_cond.notify_all()
+    
+    def _enable_passthrough(self, cap):
+        """尝试让摄像头直接输出 MJPEG 数据，不支持时恢复解码模式
+
+        返回摄像头是否可用：恢复解码模式后读不到三通道图像时返回 False
+        """
+        previous_format = cap.get(cv2.CAP_PROP_FORMAT)
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        cap.set(cv2.CAP_PROP_FORMAT, -1)
+        ret, data = cap.read()
+        if ret and data is not None and data.ndim < 3:
+            self.passthrough_active = True
+            print("✓ 摄像头 MJPEG 直通模式已启用")
+            return True
+        
+        self.passthrough_active = False
+        cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+        cap.set(cv2.CAP_PROP_FORMAT, previous_format)
+        ret, frame = cap.read()
+        if not ret or frame is None or frame.ndim != 3 or frame.shape[2] != 3:
+            print("摄像头恢复解码模式失败")
+            return False
+        print("摄像头不支持 MJPEG 直通，使用解码模式")
+        return True
+    
+    def _decode(self, seq, jpeg, reduced):
+        """解码直通帧，同一帧同一尺寸只解码一次，由所有订阅者共享"""
+        with self._decode_lock:
+            cached = self._decoded.get(reduced)
+            if cached is not None and cached[0] == seq:
+                return cached[1]
+            flags = cv2.IMREAD_REDUCED_COLOR_2 if reduced else cv2.IMREAD_COLOR
+            frame = cv2.imdecode(jpeg, flags)
+            if frame is not None:
+                frame.flags.writeable = False
+                self._decoded[reduced] = (seq, frame)
+            return frame
+    
+    def _open_mode(self, index, mode):
+        """以指定模式打开摄像头并读一帧验证，失败返回 None"""
+        cap = cv2.VideoCapture(index, cv2.CAP_V4L2)
+        if not cap.isOpened():
+            return None
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode["fourcc"]))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode["width"])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode["height"])
+        cap.set(cv2.CAP_PROP_FPS, mode["fps"])
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # 只保留最新一帧，减少延迟
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            cap.release()
+            return None
+        return cap
     
     def _initialize_camera(self):
         print("初始化共享摄像头...")
+        width, height, fps = self.requirement()
         
-        # 优先尝试摄像头1
-        for camera_index in [1, 0, 2]:
+        for camera_index, modes in self.probe().items():
+            # 直通模式需要摄像头输出 MJPEG，优先在 MJPEG 模式中选择
+            mode = None
+            if self.mjpeg_passthrough:
+                mode = camera_probe.select_mode(modes, width, height, fps, fourcc="MJPG")
+            mode = mode or camera_probe.select_mode(modes, width, height, fps)
             try:
-                print(f"尝试打开摄像头 {camera_index}...")
-                cap = cv2.VideoCapture(camera_index)
-                
-                if cap.isOpened():
-                    ret, frame = cap.read()
-                    if ret:
-                        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                        cap.set(cv2.CAP_PROP_FPS, 15)
-                        
+                print(f"尝试打开摄像头 {camera_index}: {mode['fourcc']} {mode['width']}x{mode['height']} @ {mode['fps']} fps")
+                cap = self._open_mode(camera_index, mode)
+            except Exception as e:
+                print(f"摄像头 {camera_index} 初始化失败: {e}")
+                continue
+            if cap is None:
+                print(f"摄像头 {camera_index} 不可用")
+                continue
+            
+            if self.mjpeg_passthrough and not self._enable_passthrough(cap):
+                cap.release()
+                continue
+            self.camera_index = camera_index
+            self.camera_available = True
+            self.mode = mode
+            print(f"✓ 摄像头 {camera_index} 初始化成功")
+            return cap
+        
+        # 没有 /dev/video* 的平台（如开发用的非 Linux 机器）无法探测，按编号直接打开
+        if not camera_probe.device_indexes():
+            for camera_index in self.camera_order:
+                try:
+                    cap = cv2.VideoCapture(camera_index)
+                    if cap.isOpened() and cap.read()[0]:
+                        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                        cap.set(cv2.CAP_PROP_FPS, fps)
+                        if self.mjpeg_passthrough and not self._enable_passthrough(cap):
+                            cap.release()
+                            continue
                         self.camera_index = camera_index
                         self.camera_available = True
                         print(f"✓ 摄像头 {camera_index} 初始化成功")
                         return cap
-                    else:
-                        cap.release()
-                else:
-                    print(f"摄像头 {camera_index} 不可用")
-                    
-            except Exception as e:
-                print(f"摄像头 {camera_index} 初始化失败: {e}")
-                if 'cap' in locals():
                     cap.release()
+                except Exception as e:
+                    print(f"摄像头 {camera_index} 初始化失败: {e}")
         
         print("所有摄像头都不可用，使用模拟模式")
         return None
     
-    def read_frame(self):
-        if self._camera is None:
-            return False, None
-        
-        try:
-            return self._camera.read()
-        except:
+    def read_frame(self, reduced=False):
+        """返回最新发布的帧（只读），不阻塞
+
+        reduced 为 True 时直通模式下以一半分辨率解码，解码模式下忽略
+        """
+        with self._frame_cond:
+            seq, frame, jpeg = self._frame_seq, self._latest_frame, self._latest_jpeg
+        if self.passthrough_active and jpeg is not None:
+            frame = self._decode(seq, jpeg, reduced)
+        if not self._capturing or frame is None:
             return False, None
+        return True, frame
     
-    def generate_simulation_frame(self, width=640, height=480):
-        self.simulation_frame_count += 1
-        frame = np.zeros((height, width, 3), dtype=np.uint8)
-        
-        # 渐变背景
-        for i in range(height):
-            color = int(128 + 127 * np.sin(i / 50 + self.simulation_frame_count / 30))
-            frame[i, :, 0] = color
-            frame[i, :, 1] = int(128 + 127 * np.sin(i / 40 + self.simulation_frame_count / 25))
-            frame[i, :, 2] = int(128 + 127 * np.sin(i / 60 + self.simulation_frame_count / 35))
-        
-        cv2.putText(frame, "模拟摄像头模式", (50, 50), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        cv2.putText(frame, f"帧: {self.simulation_frame_count}", (50, 100), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        
-        return frame
+    def wait_frame(self, last_seq=0, timeout=1.0, reduced=False):
+        """等待序号大于 last_seq 的新帧，返回 (序号, 只读帧)，超时返回 (last_seq, None)"""
+        deadline = time.time() + timeout
+        with self._frame_cond:
+            while self._frame_seq <= last_seq:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._capturing:
+                    return last_seq, None
+                self._frame_cond.wait(remaining)
+            seq, frame, jpeg = self._frame_seq, self._latest_frame, self._latest_jpeg
+        if self.passthrough_active:
+            frame = self._decode(seq, jpeg, reduced)
+        return seq, frame
+    
+    def create_simulation_source(self):
+        """为调用方创建独立的模拟画面来源，各模块互不影响帧序和缓冲区"""
+        return self.simulation_source_factory()
+    
+    def generate_simulation_frame(self):
+        if self._simulation_source is None:
+            self._simulation_source = self.create_simulation_source()
+        return self._simulation_source.read()
 
 # 全局单例实例
 camera_manager = CameraManager()
\ No newline at end of file
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""摄像头能力探测
+
+列出每个视频设备支持的 (格式, 宽, 高, 帧率) 组合，结果按设备签名缓存到磁盘，
+设备不变时重启不必再逐个打开摄像头试探。优先用 v4l2-ctl 读取驱动上报的模式列表，
+没有安装 v4l2-ctl 时用 OpenCV 逐个设置候选模式并读回实际生效的参数。
+
+单独运行可查看探测结果：python3 -m scripts.camera_probe [--refresh]
+"""
+
+import glob
+import json
+import os
+import re
+import subprocess
+
+LEGACY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.path.join(LEGACY_DIR, "camera_capabilities.json")
+
+# 每个像素在 USB 上传输的近似字节数，用于比较各模式的带宽开销；未知格式按未压缩估计
+FORMAT_COST = {"MJPG": 0.3, "YUYV": 2.0}
+DEFAULT_FORMAT_COST = 3.0
+
+# 没有 v4l2-ctl 时试探的候选模式
+FALLBACK_FORMATS = ("MJPG", "YUYV")
+FALLBACK_SIZES = ((320, 240), (640, 480), (800, 600), (1280, 720))
+
+
+def device_path(index):
+    return f"/dev/video{index}"
+
+
+def device_indexes():
+    """系统中存在的视频设备编号"""
+    indexes = []
+    for path in glob.glob("/dev/video*"):
+        suffix = path[len("/dev/video"):]
+        if suffix.isdigit():
+            indexes.append(int(suffix))
+    return sorted(indexes)
+
+
+def device_signature(index):
+    """设备名 + 设备号，换了摄像头或插到别的接口时缓存随之失效"""
+    try:
+        rdev = os.stat(device_path(index)).st_rdev
+    except OSError:
+        return None
+    try:
+        with open(f"/sys/class/video4linux/video{index}/name") as f:
+            name = f.read().strip()
+    except OSError:
+        name = ""
+    return f"{name}:{rdev}"
+
+
+def parse_v4l2_formats(output):
+    """解析 v4l2-ctl --list-formats-ext 的输出，只取离散尺寸和帧间隔"""
+    modes = []
+    fourcc = size = None
+    for line in output.splitlines():
+        match = re.search(r"\[\d+\]: '(\w+)'", line)
+        if match:
+            fourcc, size = match.group(1), None
+            continue
+        match = re.search(r"Size: Discrete (\d+)x(\d+)", line)
+        if match:
+            size = (int(match.group(1)), int(match.group(2)))
+            continue
+        match = re.search(r"\(([\d.]+) fps\)", line)
+        if match and fourcc and size:
+            modes.append({"fourcc": fourcc, "width": size[0], "height": size[1],
+                          "fps": round(float(match.group(1)), 2)})
+    return modes
+
+
+def probe_v4l2(index):
+    """返回驱动上报的模式列表；没有 v4l2-ctl 或查询失败时返回 None"""
+    try:
+        result = subprocess.run(['v4l2-ctl', '-d', device_path(index), '--list-formats-ext'],
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return parse_v4l2_formats(result.stdout)
+
+
+def probe_opencv(index):
+    """逐个设置候选模式并读回实际生效的参数"""
+    import cv2
+    cap = cv2.VideoCapture(index, cv2.CAP_V4L2)
+    if not cap.isOpened():
+        return []
+    modes = set()
+    try:
+        for fourcc in FALLBACK_FORMATS:
+            for width, height in FALLBACK_SIZES:
+                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                code = int(cap.get(cv2.CAP_PROP_FOURCC))
+                actual = "".join(chr((code >> 8 * i) & 0xFF) for i in range(4))
+                if actual != fourcc:
+                    continue
+                modes.add((actual, int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                           int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                           round(cap.get(cv2.CAP_PROP_FPS) or 30, 2)))
+    finally:
+        cap.release()
+    return [{"fourcc": f, "width": w, "height": h, "fps": fps} for f, w, h, fps in sorted(modes)]
+
+
+def probe_device(index):
+    modes = probe_v4l2(index)
+    if not modes:
+        modes = probe_opencv(index)
+    return modes
+
+
+def load_capabilities(indexes, path=CACHE_PATH, refresh=False):
+    """返回 {设备编号: 模式列表}，只含能采集视频的设备；签名未变的设备直接使用缓存"""
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    capabilities = {}
+    changed = False
+    for index in indexes:
+        signature = device_signature(index)
+        if signature is None:
+            continue
+        entry = cache.get(device_path(index))
+        if refresh or entry is None or entry.get("signature") != signature:
+            print(f"探测摄像头 {index} 支持的模式...")
+            entry = {"signature": signature, "modes": probe_device(index)}
+            # 没探测到模式可能只是设备被占用或暂时出错，不写入缓存，下次启动重新探测；
+            # 元数据节点等不输出视频的设备因此每次都会重新探测一遍
+            if entry["modes"]:
+                cache[device_path(index)] = entry
+                changed = True
+        if entry["modes"]:
+            capabilities[index] = entry["modes"]
+
+    if changed:
+        try:
+            tmp = path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(cache, f, indent=2)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"摄像头能力缓存写入失败: {e}")
+    return capabilities
+
+
+def mode_cost(mode):
+    return mode["width"] * mode["height"] * mode["fps"] * FORMAT_COST.get(mode["fourcc"], DEFAULT_FORMAT_COST)
+
+
+def select_mode(modes, width, height, fps, fourcc=None):
+    """选出满足尺寸和帧率要求、带宽开销最小的模式
+
+    fourcc 指定时只考虑该格式；没有模式能满足要求时退而选最接近的（尺寸优先，其次帧率）。
+    """
+    if fourcc is not None:
+        modes = [mode for mode in modes if mode["fourcc"] == fourcc]
+    if not modes:
+        return None
+    suitable = [mode for mode in modes
+                if mode["width"] >= width and mode["height"] >= height and mode["fps"] >= fps]
+    if suitable:
+        return min(suitable, key=mode_cost)
+    return max(modes, key=lambda mode: (min(mode["width"], width) * min(mode["height"], height),
+                                        min(mode["fps"], fps), -mode_cost(mode)))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="摄像头能力探测")
+    parser.add_argument('--refresh', action='store_true', help='忽略缓存重新探测')
+    args = parser.parse_args()
+    for index, modes in load_capabilities(device_indexes(), refresh=args.refresh).items():
+        print(f"{device_path(index)}:")
+        for mode in sorted(modes, key=mode_cost):
+            print(f"  {mode['fourcc']} {mode['width']}x{mode['height']} @ {mode['fps']} fps")
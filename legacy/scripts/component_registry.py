@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""子系统注册表
+
+各子系统（摄像头、检票、播报、温湿度、灯带）的初始化互不依赖，却都要打开硬件或加载模型，
+逐个在导入时初始化会让服务启动等上好几秒。这里只登记各子系统的构造函数：
+start_all() 在后台线程中并行初始化全部子系统，get() 在首次使用时按需初始化，
+已在初始化的子系统只等待它完成，不会重复构造。每个子系统的状态和初始化耗时由 status() 汇报。
+"""
+
+import threading
+import time
+import traceback
+
+PENDING, STARTING, READY, FAILED = "pending", "starting", "ready", "failed"
+
+
+class Component:
+    """注册表中的一个子系统"""
+
+    def __init__(self, name, factory, cleanup=None):
+        self.name = name
+        self.factory = factory
+        self.cleanup = cleanup
+        self.state = PENDING
+        self.instance = None
+        self.error = None
+        self.started_at = None
+        self.init_time = None  # 初始化耗时（秒）
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _claim(self):
+        """由第一个调用者负责初始化，返回是否抢到"""
+        with self._lock:
+            if self.state != PENDING:
+                return False
+            self.state = STARTING
+            self.started_at = time.monotonic()
+            return True
+
+    def _initialize(self):
+        try:
+            instance, error = self.factory(), None
+            if instance is None:
+                error = "不可用"
+        except Exception as e:
+            instance, error = None, str(e)
+            traceback.print_exc()
+        # 先记录耗时再更新状态，status() 看到终态时耗时总是已就绪
+        self.init_time = time.monotonic() - self.started_at
+        self.instance, self.error = instance, error
+        self.state = FAILED if error else READY
+        if error:
+            print(f"✗ {self.name} 初始化失败: {error}")
+        else:
+            print(f"✓ {self.name} 初始化完成 ({self.init_time * 1000:.0f} ms)")
+        self._done.set()
+
+    def ensure_started(self, wait=True, timeout=None):
+        if self._claim():
+            if wait:
+                self._initialize()
+            else:
+                thread = threading.Thread(target=self._initialize, name=f"init-{self.name}")
+                thread.daemon = True
+                thread.start()
+        if wait:
+            self._done.wait(timeout)
+        return self.instance if self.state == READY else None
+
+    def status(self):
+        status = {"state": self.state}
+        if self.init_time is not None:
+            status["init_ms"] = round(self.init_time * 1000, 1)
+        elif self.state == STARTING:
+            status["elapsed_ms"] = round((time.monotonic() - self.started_at) * 1000, 1)
+        if self.error:
+            status["error"] = self.error
+        return status
+
+
+class ComponentRegistry:
+    def __init__(self):
+        self._components = {}
+
+    def register(self, name, factory, cleanup=None):
+        """登记子系统；factory 返回实例，失败时抛出异常或返回 None"""
+        self._components[name] = Component(name, factory, cleanup)
+
+    def start_all(self):
+        """在后台线程中并行初始化所有尚未开始的子系统，立即返回"""
+        for component in self._components.values():
+            component.ensure_started(wait=False)
+
+    def get(self, name, timeout=None):
+        """返回子系统实例，首次调用时初始化；不可用时返回 None"""
+        return self._components[name].ensure_started(timeout=timeout)
+
+    def peek(self, name):
+        """不触发初始化、不等待，只返回已就绪的实例"""
+        component = self._components[name]
+        return component.instance if component.state == READY else None
+
+    def status(self):
+        return {name: component.status() for name, component in self._components.items()}
+
+    def cleanup(self):
+        """清理已就绪的子系统；仍在初始化的不等待"""
+        for component in self._components.values():
+            if component.state == READY and component.cleanup is not None:
+                try:
+                    component.cleanup(component.instance)
+                except Exception as e:
+                    print(f"{component.name} 清理失败: {e}")
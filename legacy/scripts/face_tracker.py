@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import itertools
+import time
+
+import cv2
+import numpy as np
+
+
+def iou(a, b):
+    """两个 (x, y, w, h) 框的交并比"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class Track:
+    """单个人脸轨迹，用匀速卡尔曼滤波预测检测间隔中的位置"""
+
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.misses = 0  # 连续多少次检测未匹配到
+        self.hits = 1
+
+        # 状态 [cx, cy, w, h, vx, vy]，观测 [cx, cy, w, h]
+        kf = cv2.KalmanFilter(6, 4)
+        kf.transitionMatrix = np.eye(6, dtype=np.float32)
+        kf.transitionMatrix[0, 4] = 1
+        kf.transitionMatrix[1, 5] = 1
+        kf.measurementMatrix = np.eye(4, 6, dtype=np.float32)
+        kf.processNoiseCov = np.eye(6, dtype=np.float32) * 1e-2
+        kf.processNoiseCov[4:, 4:] *= 0.1
+        kf.measurementNoiseCov = np.eye(4, dtype=np.float32) * 1e-1
+        kf.errorCovPost = np.eye(6, dtype=np.float32)
+        kf.statePost = np.zeros((6, 1), dtype=np.float32)
+        kf.statePost[:4, 0] = self._to_measurement(box)
+        self.kf = kf
+        self.box = tuple(int(v) for v in box)
+
+    @staticmethod
+    def _to_measurement(box):
+        x, y, w, h = box
+        return np.array([x + w / 2, y + h / 2, w, h], dtype=np.float32)
+
+    def _set_box(self, state):
+        cx, cy, w, h = (float(v) for v in state[:4, 0])
+        w, h = max(w, 1.0), max(h, 1.0)
+        self.box = (int(cx - w / 2), int(cy - h / 2), int(w), int(h))
+
+    def predict(self):
+        self._set_box(self.kf.predict())
+        return self.box
+
+    def correct(self, box):
+        self._set_box(self.kf.correct(self._to_measurement(box).reshape(4, 1)))
+        self.misses = 0
+        self.hits += 1
+
+
+class FaceTracker:
+    """人脸跟踪：每 detect_every 帧做一次完整检测，中间帧用卡尔曼预测传递人脸框
+
+    检测结果按 IoU 贪心匹配到已有轨迹，同一位游客在画面中保持同一个 ID。
+    丢失的轨迹保留 lost_ttl 秒，期间在原位置附近重新检测到的人脸沿用原 ID，
+    游客转头或被短暂遮挡后不会被当作新游客。
+    """
+
+    def __init__(self, detect_every=5, iou_threshold=0.3, max_misses=2, lost_ttl=3.0):
+        self.detect_every = detect_every
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.lost_ttl = lost_ttl
+        self.tracks = []
+        self.lost = []  # [(轨迹, 丢失时间), ...]
+        self.frames_since_detection = 0
+        self._ids = itertools.count(1)
+
+    def due(self):
+        """本帧是否需要完整检测"""
+        return not self.tracks or self.frames_since_detection + 1 >= self.detect_every
+
+    def predict(self):
+        """无检测的帧：推进所有轨迹并返回 [(id, box), ...]"""
+        self.frames_since_detection += 1
+        for track in self.tracks:
+            track.predict()
+        return self.results()
+
+    def update(self, detections):
+        """用一帧的检测结果更新轨迹并返回 [(id, box), ...]"""
+        self.frames_since_detection = 0
+        for track in self.tracks:
+            track.predict()
+
+        pairs = sorted(
+            ((iou(track.box, det), ti, di)
+             for ti, track in enumerate(self.tracks)
+             for di, det in enumerate(detections)),
+            reverse=True,
+        )
+        matched_tracks, matched_dets = set(), set()
+        for score, ti, di in pairs:
+            if score < self.iou_threshold:
+                break
+            if ti in matched_tracks or di in matched_dets:
+                continue
+            self.tracks[ti].correct(detections[di])
+            matched_tracks.add(ti)
+            matched_dets.add(di)
+
+        now = time.monotonic()
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.misses += 1
+        self.lost = [(t, lost_at) for t, lost_at in self.lost if now - lost_at <= self.lost_ttl]
+        self.lost += [(t, now) for t in self.tracks if t.misses > self.max_misses]
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for di, det in enumerate(detections):
+            if di not in matched_dets:
+                self.tracks.append(Track(self._reacquire(det), det))
+        return self.results()
+
+    def _reacquire(self, box):
+        """新出现的人脸与丢失轨迹的最后位置重合时沿用其 ID，否则分配新 ID"""
+        best, best_score = None, self.iou_threshold
+        for i, (track, _) in enumerate(self.lost):
+            score = iou(track.box, box)
+            if score >= best_score:
+                best, best_score = i, score
+        if best is None:
+            return next(self._ids)
+        return self.lost.pop(best)[0].id
+
+    def results(self):
+        # 本轮检测未匹配上的轨迹不再输出，避免残留框
+        return [(t.id, t.box) for t in self.tracks if t.misses == 0]
+
+    def track_ids(self):
+        """画面中的轨迹和仍可能被重新找回的丢失轨迹"""
+        return {t.id for t in self.tracks} | {t.id for t, _ in self.lost}
+
+    def reset(self):
+        self.tracks = []
+        self.lost = []
+        self.frames_since_detection = 0
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+
+import cv2
+import numpy as np
+
+
+class SyntheticSource:
+    """模拟摄像头：逐行正弦渐变背景
+
+    每行颜色只与行号和帧号有关，行号相关的部分预先算好，每帧只需一次向量化 sin。
+    每帧都写入新分配的数组：发布出去的只读帧可能被订阅者长期持有，不能原地复用。
+    """
+
+    # 各通道 (行号除数, 帧号除数)
+    CHANNELS = ((50, 30), (40, 25), (60, 35))
+
+    def __init__(self, width=640, height=480):
+        self.width = width
+        self.height = height
+        self.frame_count = 0
+        rows = np.arange(height, dtype=np.float32)[:, None]
+        self._row_phase = rows / np.array([c[0] for c in self.CHANNELS], dtype=np.float32)
+        self._speed = 1 / np.array([c[1] for c in self.CHANNELS], dtype=np.float32)
+        self._offset = np.empty(3, dtype=np.float32)
+        self._wave = np.empty((height, 3), dtype=np.float32)
+        self._column = np.empty((height, 1, 3), dtype=np.uint8)
+
+        # 固定的标题文字只渲染一次，之后每帧按掩码写入
+        label = np.zeros((height, width), dtype=np.uint8)
+        cv2.putText(label, "模拟摄像头模式", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, 255, 2)
+        ys, xs = np.nonzero(label)
+        if len(ys):
+            self._label_roi = (slice(ys.min(), ys.max() + 1), slice(xs.min(), xs.max() + 1))
+            self._label_mask = label[self._label_roi] > 0
+        else:
+            self._label_roi = None
+
+    def read(self):
+        """生成下一帧（只读，与帧总线一致）"""
+        self.frame_count += 1
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+        wave = self._wave
+        np.multiply(self._speed, self.frame_count, out=self._offset)
+        np.add(self._row_phase, self._offset, out=wave)
+        np.sin(wave, out=wave)
+        wave *= 127
+        wave += 128
+        self._column[:, 0, :] = wave
+        frame[:] = self._column
+
+        if self._label_roi is not None:
+            frame[self._label_roi][self._label_mask] = 255
+        cv2.putText(frame, f"帧: {self.frame_count}", (50, 100),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        frame.flags.writeable = False
+        return frame
+
+    def close(self):
+        pass
+
+
+class VideoFileSource:
+    """用录制的视频模拟摄像头，播放到结尾后从头循环
+
+    realtime 为 True 时按视频自身帧率随时间推进（调用过快时重复返回当前帧，过慢时跳帧），
+    与真实摄像头行为一致；为 False 时每次调用都返回下一帧，用于测量流水线的最大吞吐量。
+    返回的帧只读，每帧单独分配，不会被之后的读取覆盖。
+    """
+
+    def __init__(self, path, realtime=True, fps=None):
+        self.path = path
+        self.realtime = realtime
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"无法打开视频文件: {path}")
+        self.fps = fps or self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.frame_count = 0
+        self.start_time = None
+        self._position = 0  # 已从视频读取的帧数
+        self._frame = None
+
+    def _next(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+            if not ret:
+                return self._frame
+        frame.flags.writeable = False
+        self._position += 1
+        return frame
+
+    def read(self):
+        self.frame_count += 1
+        if not self.realtime or self._frame is None:
+            if self.start_time is None:
+                self.start_time = time.time()
+            self._frame = self._next()
+            return self._frame
+
+        target = int((time.time() - self.start_time) * self.fps) + 1
+        if target > self._position:
+            # 落后时只 grab 不解码，直接跳到当前时刻对应的帧
+            for _ in range(target - self._position - 1):
+                if not self.cap.grab():
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                self._position += 1
+            self._frame = self._next()
+        return self._frame
+
+    def close(self):
+        self.cap.release()
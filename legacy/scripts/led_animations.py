@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""灯带动画帧表
+
+每种动画按 (动画, 灯珠数, 拖尾长度, 亮度, 帧率) 一次性算出全部帧，颜色打包为 0xRRGGBB，
+播放时只需按帧号取出整帧写入灯带，不再逐帧计算颜色和亮度。
+"""
+
+import math
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+ANIMATIONS = ("chase", "breathing", "gradient")
+
+# 柔和配色：淡紫、淡蓝、淡绿、淡粉，对应色环上的四个区间
+PASTEL_PALETTE = np.array([(80, 60, 100), (60, 80, 100), (80, 100, 60), (100, 80, 60)], dtype=np.float64)
+
+BREATH_SECONDS = 4.0  # 呼吸灯一次明暗循环的时长
+
+
+def _chase(led_count, chase_length, fps):
+    """跑马灯：每帧前进一格，拖尾亮度线性衰减，颜色随位置在色环上变化"""
+    frames = np.arange(led_count)
+    colors = PASTEL_PALETTE[(frames * 8 % 256) // 64]
+    table = np.zeros((led_count, led_count, 3), dtype=np.float64)
+    # 从拖尾末端往头部写，与原逐灯实现一样，拖尾重叠时亮的覆盖暗的；
+    # 亮度系数的算法和 float64 精度都与原实现的 int(color * factor) 保持一致
+    for distance in range(chase_length - 1, -1, -1):
+        factor = max(0, 1 - distance * (1.0 / chase_length))
+        table[frames, (frames - distance) % led_count] = np.trunc(colors * factor)
+    return table
+
+
+def _breathing(led_count, chase_length, fps):
+    """呼吸灯：整条灯带同色明暗变化，每次呼吸换一种颜色"""
+    period = max(2, round(BREATH_SECONDS * fps))
+    phase = np.arange(period) / period
+    level = 0.1 + 0.9 * (1 - np.cos(2 * math.pi * phase)) / 2
+    table = level[None, :, None] * PASTEL_PALETTE[:, None, :]
+    table = np.floor(table.reshape(-1, 3))
+    return np.repeat(table[:, None, :], led_count, axis=1)
+
+
+def _gradient(led_count, chase_length, fps):
+    """流动渐变：四种颜色沿灯带平滑过渡，每帧整体移动一格"""
+    palette = np.vstack([PASTEL_PALETTE, PASTEL_PALETTE[:1]])
+    positions = (np.arange(led_count)[None, :] + np.arange(led_count)[:, None]) % led_count
+    x = positions / led_count * len(PASTEL_PALETTE)
+    index = x.astype(np.intp)
+    t = (x - index)[..., None]
+    return np.floor(palette[index] * (1 - t) + palette[index + 1] * t)
+
+
+_BUILDERS = {"chase": _chase, "breathing": _breathing, "gradient": _gradient}
+
+
+def build_table(animation, led_count, chase_length, brightness, fps):
+    """返回 (帧数, 灯珠数) 的 uint32 颜色表"""
+    rgb = _BUILDERS[animation](led_count, chase_length, fps).astype(np.uint32)
+    # 与 rpi_ws281x 的硬件亮度缩放一致：分量 × (亮度 + 1) >> 8
+    rgb = (rgb * (brightness + 1)) >> 8
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+@lru_cache(maxsize=8)
+def packed_frames(animation, segments, chase_length, brightness, fps):
+    """按灯带分段打包的帧表：frames[帧号][分段] 为该段的 array('I')"""
+    table = build_table(animation, sum(segments), chase_length, brightness, fps)
+    bounds = np.cumsum((0,) + segments)
+    frames = []
+    for row in table:
+        parts = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            part = array('I')
+            part.frombytes(row[start:end].astype(np.uint32).tobytes())
+            parts.append(part)
+        frames.append(tuple(parts))
+    return tuple(frames)
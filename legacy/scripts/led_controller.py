@@ -1,29 +1,34 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import threading
-import time
 import atexit
+import ctypes
 import os
+from scripts.scheduler import scheduler
+from scripts.led_animations import ANIMATIONS, packed_frames
 
 class LEDController:
     def __init__(self):
-        # LED配置
-        self.LED_COUNT = 30
-        self.LED_PIN = 18
+        # LED配置：每段灯带接在不同的引脚上，使用各自的 DMA 通道，动画按顺序连成一整条
+        self.LED_SEGMENTS = [
+            {'count': 30, 'pin': 18, 'dma': 10, 'channel': 0},
+        ]
+        self.LED_COUNT = sum(segment['count'] for segment in self.LED_SEGMENTS)
         self.LED_FREQ_HZ = 800000
-        self.LED_DMA = 10
-        self.LED_BRIGHTNESS = 50
         self.LED_INVERT = False
-        self.LED_CHANNEL = 0
         
         # 控制变量
-        self.animation_thread = None
+        self.animation_task = None
+        self.animation = "chase"
+        self.frame_rate = 10  # 动画帧率
+        self.frame_index = 0
         self.is_running = False
         self.brightness = 50
         self.chase_length = 5
         self.simulation_mode = False
         self.strip = None
+        self.strips = []
+        self.led_buffers = []  # 各段灯带在 C 库中的像素缓冲区地址，取不到时为 None
         
         # 尝试初始化物理灯带
         self.setup_led_strip()
@@ -52,16 +57,21 @@ class LEDController:
             from rpi_ws281x import PixelStrip
             
             print("正在初始化物理灯带...")
-            self.strip = PixelStrip(
-                self.LED_COUNT, 
-                self.LED_PIN, 
-                self.LED_FREQ_HZ, 
-                self.LED_DMA, 
-                self.LED_INVERT, 
-                self.LED_BRIGHTNESS, 
-                self.LED_CHANNEL
-            )
-            self.strip.begin()
+            # 亮度已计入帧表，硬件亮度固定为最大
+            for segment in self.LED_SEGMENTS:
+                strip = PixelStrip(
+                    segment['count'], 
+                    segment['pin'], 
+                    self.LED_FREQ_HZ, 
+                    segment['dma'], 
+                    self.LED_INVERT, 
+                    255, 
+                    segment['channel']
+                )
+                strip.begin()
+                self.strips.append(strip)
+                self.led_buffers.append(self.led_buffer(strip))
+            self.strip = self.strips[0]
             self.simulation_mode = False
             print("✓ 物理灯带初始化成功")
             
@@ -70,6 +80,22 @@ class LEDController:
             print("切换到模拟模式")
             self.simulation_mode = True
             self.strip = None
+            self.strips = []
+            self.led_buffers = []
+
+    @staticmethod
+    def led_buffer(strip):
+        """返回灯带像素缓冲区（ws2811_led_t 数组，每颗 0x00RRGGBB）的地址
+
+        rpi_ws281x 的 Python 接口只能逐颗 setPixelColor，每颗都要经过一次 SWIG 调用；
+        缓冲区由 begin() 分配，这里通过 SWIG 指针取得地址，播放时整段一次 memmove 写入。
+        绑定版本不提供该接口时返回 None，退回逐颗写入。
+        """
+        try:
+            import _rpi_ws281x as ws
+            return int(ws.ws2811_channel_t_leds_get(strip._channel)) or None
+        except (ImportError, AttributeError, TypeError):
+            return None
 
     def is_raspberry_pi(self):
         """检查是否在树莓派上"""
@@ -98,72 +124,47 @@ class LEDController:
             return
         
         try:
-            for i in range(self.LED_COUNT):
-                self.strip.setPixelColor(i, 0)
-            self.strip.show()
+            for strip in self.strips:
+                for i in range(strip.numPixels()):
+                    strip.setPixelColor(i, 0)
+                strip.show()
             print("物理: 所有LED已关闭")
         except Exception as e:
             print(f"清除LED失败: {e}")
 
-    def pastel_wheel(self, pos):
-        """生成柔和的颜色"""
-        pos = pos % 256
-        if pos < 64:
-            return (80, 60, 100)  # 淡紫色
-        elif pos < 128:
-            return (60, 80, 100)  # 淡蓝色
-        elif pos < 192:
-            return (80, 100, 60)  # 淡绿色
-        else:
-            return (100, 80, 60)  # 淡粉色
-
-    def chase_animation(self):
-        """跑马灯动画"""
-        print(f"开始跑马灯动画 - 亮度: {self.brightness}, 长度: {self.chase_length}")
-        frame_count = 0
+    def show_frame(self, frame):
+        """把一整帧（每段一个 array('I')）写入灯带，颜色已预先计算好"""
+        for strip, buffer, colors in zip(self.strips, self.led_buffers, frame):
+            if buffer is not None and colors.itemsize == 4:
+                address, count = colors.buffer_info()
+                ctypes.memmove(buffer, address, count * 4)
+            else:
+                set_pixel = strip.setPixelColor
+                for i, color in enumerate(colors):
+                    set_pixel(i, color)
+            strip.show()
+
+    def current_frames(self):
+        segments = tuple(segment['count'] for segment in self.LED_SEGMENTS)
+        return packed_frames(self.animation, segments, self.chase_length,
+                             self.brightness, self.frame_rate)
+
+    def animation_step(self):
+        """播放下一帧，由调度器按帧率调用"""
+        frames = self.current_frames()
+        index = self.frame_index % len(frames)
         
-        while self.is_running:
-            try:
-                for i in range(self.LED_COUNT):
-                    if not self.is_running:
-                        break
-                    
-                    if not self.simulation_mode and self.strip:
-                        # 物理灯带控制
-                        from rpi_ws281x import Color
-                        
-                        # 清除所有LED
-                        for j in range(self.LED_COUNT):
-                            self.strip.setPixelColor(j, 0)
-                        
-                        # 设置当前LED和拖尾效果
-                        for j in range(-self.chase_length + 1, 1):
-                            led_index = (i + j) % self.LED_COUNT
-                            if 0 <= led_index < self.LED_COUNT:
-                                # 计算亮度
-                                brightness_factor = max(0, 1 - abs(j) * (1.0 / self.chase_length))
-                                color = self.pastel_wheel(i * 8)
-                                r = int(color[0] * brightness_factor)
-                                g = int(color[1] * brightness_factor)
-                                b = int(color[2] * brightness_factor)
-                                self.strip.setPixelColor(led_index, Color(r, g, b))
-                        
-                        self.strip.show()
-                        
-                    else:
-                        # 模拟模式
-                        if frame_count % 20 == 0:  # 每20帧打印一次
-                            print(f"模拟: 跑马灯位置 {i}, 长度 {self.chase_length}, 亮度 {self.brightness}")
-                    
-                    time.sleep(0.1)
-                    frame_count += 1
-                    
-            except Exception as e:
-                print(f"动画错误: {e}")
-                break
+        if not self.simulation_mode and self.strips:
+            self.show_frame(frames[index])
+        elif self.frame_index % 20 == 0:  # 模拟模式每20帧打印一次
+            print(f"模拟: {self.animation} 第 {index} 帧, 长度 {self.chase_length}, 亮度 {self.brightness}")
         
-        self.clear_leds()
-        print("跑马灯动画结束")
+        self.frame_index += 1
+
+    def _refresh(self):
+        # 参数变化后立即显示新帧表，不必等到下一帧
+        if self.animation_task is not None:
+            self.animation_task.trigger()
 
     def start_animation(self):
         """启动动画"""
@@ -172,9 +173,10 @@ class LEDController:
             return
         
         self.is_running = True
-        self.animation_thread = threading.Thread(target=self.chase_animation)
-        self.animation_thread.daemon = True
-        self.animation_thread.start()
+        self.frame_index = 0
+        print(f"开始{self.animation}动画 - 亮度: {self.brightness}, 长度: {self.chase_length}")
+        # 帧表已预先算好，每帧只需写入灯带，直接在共享调度线程中执行
+        self.animation_task = scheduler.every(1.0 / self.frame_rate, self.animation_step, name="led_animation")
         
         mode = "模拟" if self.simulation_mode else "物理"
         print(f"{mode}跑马灯已启动 - 亮度: {self.brightness}, 长度: {self.chase_length}")
@@ -185,26 +187,32 @@ class LEDController:
             return
         
         self.is_running = False
-        if self.animation_thread and self.animation_thread.is_alive():
-            self.animation_thread.join(timeout=2)
+        if self.animation_task is not None:
+            self.animation_task.cancel()
+            self.animation_task = None
         self.clear_leds()
         print("跑马灯已停止")
 
     def set_brightness(self, brightness):
         """设置亮度"""
         self.brightness = max(0, min(255, brightness))
-        
-        if not self.simulation_mode and self.strip:
-            self.strip.setBrightness(self.brightness)
-            if self.is_running:
-                self.strip.show()  # 立即更新
-        
         print(f"亮度设置为: {self.brightness}")
+        self._refresh()
 
     def set_chase_length(self, length):
         """设置跑马灯长度"""
         self.chase_length = max(1, min(30, length))
         print(f"跑马灯长度设置为: {self.chase_length}")
+        self._refresh()
+
+    def set_animation(self, animation):
+        """切换动画：chase（跑马灯）、breathing（呼吸灯）或 gradient（流动渐变）"""
+        if animation not in ANIMATIONS:
+            raise ValueError(f"未知动画: {animation}")
+        self.animation = animation
+        self.frame_index = 0
+        print(f"动画设置为: {self.animation}")
+        self._refresh()
 
     def get_status(self):
         """获取状态"""
@@ -212,6 +220,8 @@ class LEDController:
             "is_running": self.is_running,
             "brightness": self.brightness,
             "chase_length": self.chase_length,
+            "animation": self.animation,
+            "frame_rate": self.frame_rate,
             "simulation_mode": self.simulation_mode,
             "led_count": self.LED_COUNT
         }
\ No newline at end of file
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+import cv2
+
+# multipart/x-mixed-replace 每帧的分隔头，所有客户端共用
+FRAME_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+
+class MJPEGBroadcaster:
+    """MJPEG 视频流分发：每帧只编码一次，编码结果由所有客户端共享"""
+
+    def __init__(self, quality=70):
+        self.quality = quality
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._frame = None
+        self._raw_jpeg = None
+        self.closed = False
+
+        self._encode_lock = threading.Lock()
+        self._chunk_seq = 0
+        self._jpeg = None
+        self._chunk = None
+
+    def publish(self, frame):
+        """发布新帧，发布后调用方不应再修改该帧"""
+        with self._cond:
+            self._seq += 1
+            self._frame = frame
+            self._raw_jpeg = None
+            self.closed = False
+            self._cond.notify_all()
+
+    def publish_jpeg(self, jpeg):
+        """发布已编码好的 JPEG 数据（如摄像头原生 MJPEG 帧），跳过编码"""
+        with self._cond:
+            self._seq += 1
+            self._frame = None
+            self._raw_jpeg = jpeg
+            self.closed = False
+            self._cond.notify_all()
+
+    def close(self):
+        """停止发布，正在输出的视频流随之结束；之后再发布新帧时自动重新打开"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def latest(self):
+        """返回 (序号, JPEG 字节, 完整的 multipart 分块)，按需编码且每帧只编码一次"""
+        with self._cond:
+            seq, frame, raw_jpeg = self._seq, self._frame, self._raw_jpeg
+        if frame is None and raw_jpeg is None:
+            return seq, None, None
+
+        with self._encode_lock:
+            if self._chunk_seq < seq:
+                if raw_jpeg is not None:
+                    self._jpeg = bytes(raw_jpeg)
+                else:
+                    ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                    if not ret:
+                        return seq, None, None
+                    self._jpeg = jpeg.tobytes()
+                self._chunk = b''.join((FRAME_HEADER, self._jpeg, b'\r\n'))
+                self._chunk_seq = seq
+            return self._chunk_seq, self._jpeg, self._chunk
+
+    def get_frame_bytes(self):
+        return self.latest()[1]
+
+    def stream(self, idle_timeout=10.0):
+        """视频流生成器，只在有新帧发布时唤醒
+
+        广播器关闭或 idle_timeout 秒内没有新帧时结束，客户端断开后响应线程不会一直挂着
+        """
+        last_seq = 0
+        while True:
+            deadline = time.monotonic() + idle_timeout
+            with self._cond:
+                while self._seq <= last_seq and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    self._cond.wait(remaining)
+                if self.closed:
+                    return
+            seq, _, chunk = self.latest()
+            last_seq = seq
+            if chunk is not None:
+                yield chunk
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+
+import cv2
+
+
+class MotionGate:
+    """基于背景差分的运动检测，在极小的灰度图上运行，开销远低于人脸检测"""
+
+    def __init__(self, size=(80, 60), alpha=0.05, pixel_threshold=25, area_threshold=0.01):
+        self.size = size
+        self.alpha = alpha  # 背景更新速率
+        self.pixel_threshold = pixel_threshold  # 像素被视为变化的灰度差
+        self.area_threshold = area_threshold  # 变化像素占比超过该值视为有运动
+        self.background = None
+        self.motion_ratio = 0.0
+
+    def update(self, frame):
+        """用新帧更新背景并返回画面是否有变化"""
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        gray = cv2.GaussianBlur(gray, (5, 5), 0).astype('float32')
+
+        if self.background is None:
+            self.background = gray
+            return True
+
+        diff = cv2.absdiff(gray, self.background)
+        changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+        self.motion_ratio = changed / diff.size
+        cv2.accumulateWeighted(gray, self.background, self.alpha)
+        return self.motion_ratio > self.area_threshold
+
+    def reset(self):
+        self.background = None
+        self.motion_ratio = 0.0
+
+
+class DetectionScheduler:
+    """根据运动和检票状态决定本帧是否运行人脸/二维码检测
+
+    - IDLE：画面静止，仅按较长间隔兜底检测（背景会逐渐吸收静止不动的游客）
+    - APPROACHING：最近有运动，有变化的帧立即检测，否则按中等间隔检测
+    - TRANSACTION：检票进行中，每帧都检测
+    """
+
+    # 各状态下两次检测之间的最小间隔（秒）
+    BUDGETS = {"IDLE": 2.0, "APPROACHING": 0.2, "TRANSACTION": 0.0}
+
+    def __init__(self, approach_hold=3.0):
+        self.approach_hold = approach_hold  # 运动停止后保持 APPROACHING 的时间
+        self.gate = MotionGate()
+        self.mode = "IDLE"
+        self.last_motion_time = 0
+        self.last_detection_time = 0
+
+    def should_detect(self, frame, checking_state, now=None):
+        now = time.time() if now is None else now
+        motion = self.gate.update(frame)
+        if motion:
+            self.last_motion_time = now
+
+        if checking_state != "WAITING":
+            self.mode = "TRANSACTION"
+        elif now - self.last_motion_time < self.approach_hold:
+            self.mode = "APPROACHING"
+        else:
+            self.mode = "IDLE"
+
+        # 画面刚发生变化时立即检测，保证游客出现后不超过一帧就能响应
+        if motion or now - self.last_detection_time >= self.BUDGETS[self.mode]:
+            self.last_detection_time = now
+            return True
+        return False
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+
+import cv2
+import numpy as np
+from pyzbar import pyzbar
+
+
+class QRScanner:
+    """二维码识别：先定位候选区域，再按原分辨率只解码这些区域
+
+    1. 上一次解码成功的位置附近优先搜索（游客出示二维码时通常不会大幅移动）
+    2. 用 cv2.QRCodeDetector 在缩小的灰度图上定位所有候选二维码
+    3. 都找不到时退回到对整幅缩小图像解码
+    返回的坐标均为输入帧的坐标。
+    """
+
+    def __init__(self, locate_max_edge=640, fallback_size=(320, 240), margin=0.25, track_timeout=1.0):
+        self.locate_max_edge = locate_max_edge  # 定位时图像的最长边
+        self.fallback_size = fallback_size
+        self.margin = margin  # 裁剪区域相对二维码边长的外扩比例
+        self.track_timeout = track_timeout  # 上次位置的有效期（秒）
+        self.detector = cv2.QRCodeDetector()
+        self.last_rects = []
+        self.last_seen = 0
+
+    def scan(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+        # 1. 在上次的位置附近搜索
+        if self.last_rects and time.time() - self.last_seen < self.track_timeout:
+            results = self._decode_regions(gray, self.last_rects)
+            if results:
+                return self._remember(results)
+
+        # 2. 定位候选区域
+        regions = self._locate(gray)
+        if regions:
+            results = self._decode_regions(gray, regions)
+            if results:
+                return self._remember(results)
+
+        # 3. 退回到整幅缩小图像解码
+        height, width = gray.shape[:2]
+        small = cv2.resize(gray, self.fallback_size, interpolation=cv2.INTER_AREA)
+        sx, sy = width / self.fallback_size[0], height / self.fallback_size[1]
+        results = [self._result(obj, 0, 0, sx, sy) for obj in pyzbar.decode(small) if obj.data]
+        return self._remember(results)
+
+    def _locate(self, gray):
+        """返回候选二维码的外接矩形 (x, y, w, h) 列表"""
+        height, width = gray.shape[:2]
+        scale = min(1.0, self.locate_max_edge / max(width, height))
+        small = gray if scale == 1.0 else cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        try:
+            ok, points = self.detector.detectMulti(small)
+        except cv2.error:
+            return []
+        if not ok or points is None:
+            return []
+        return [cv2.boundingRect((quad / scale).astype(np.int32)) for quad in points]
+
+    def _decode_regions(self, gray, rects):
+        height, width = gray.shape[:2]
+        results = []
+        seen = set()
+        for x, y, w, h in rects:
+            pad = int(max(w, h) * self.margin)
+            x0, y0 = max(0, x - pad), max(0, y - pad)
+            x1, y1 = min(width, x + w + pad), min(height, y + h + pad)
+            if x1 <= x0 or y1 <= y0:
+                continue
+            for obj in pyzbar.decode(gray[y0:y1, x0:x1]):
+                if obj.data and obj.data not in seen:
+                    seen.add(obj.data)
+                    results.append(self._result(obj, x0, y0))
+        return results
+
+    @staticmethod
+    def _result(obj, dx, dy, sx=1.0, sy=1.0):
+        polygon = [(int(p.x * sx) + dx, int(p.y * sy) + dy) for p in obj.polygon]
+        r = obj.rect
+        rect = (int(r.left * sx) + dx, int(r.top * sy) + dy, int(r.width * sx), int(r.height * sy))
+        return {'data': obj.data.decode('utf-8'), 'polygon': polygon, 'rect': rect}
+
+    def _remember(self, results):
+        if results:
+            self.last_rects = [qr['rect'] for qr in results]
+            self.last_seen = time.time()
+        return results
+
+    def reset(self):
+        self.last_rects = []
+        self.last_seen = 0
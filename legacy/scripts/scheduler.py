@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class Task:
+    """调度器中的一个周期任务，由 Scheduler.every 创建"""
+
+    def __init__(self, scheduler, func, interval, name, threaded):
+        self.scheduler = scheduler
+        self.func = func
+        self.interval = interval
+        self.name = name or getattr(func, '__name__', 'task')
+        self.threaded = threaded
+        self.cancelled = False
+        self.version = 0  # 每次重新排期加一，堆中旧的条目随之失效
+        # 执行期间持有；取消后拿到这把锁，说明执行中的这一次已结束、之后的也不会再执行
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    def trigger(self):
+        """事件触发：立即执行一次，之后从现在起重新按周期执行"""
+        self.scheduler._schedule(self, time.monotonic())
+
+    def cancel(self, wait=True):
+        """取消任务；wait 为 True 时等待正在执行的这一次结束"""
+        self.cancelled = True
+        self._wakeup.set()
+        self.scheduler._wake()
+        if not wait:
+            return
+        current = threading.current_thread()
+        if self._worker is not None and self._worker is not current:
+            self._worker.join(timeout=2.0)
+        elif current is not self.scheduler._thread and current is not self._worker:
+            # 调度线程可能已取出本任务、正要执行，等它执行完或看到 cancelled 后跳过
+            if self._lock.acquire(timeout=2.0):
+                self._lock.release()
+
+    def _run(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            try:
+                self.func()
+            except Exception as e:
+                print(f"调度任务 {self.name} 出错: {e}")
+
+    def _dispatch(self):
+        if not self.threaded:
+            self._run()
+            return
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._work, name=self.name)
+            self._worker.daemon = True
+            self._worker.start()
+        # 上一次尚未执行完时多次唤醒合并为一次
+        self._wakeup.set()
+
+    def _work(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self.cancelled:
+                break
+            self._run()
+
+
+class Scheduler:
+    """共享的截止时间调度器：一个线程按最早截止时间休眠，没有到期任务时不会被唤醒
+
+    - 周期任务按固定节拍执行（下一次 = 本次截止时间 + 周期），执行耗时不会累积成漂移，
+      落后超过一个周期时跳过错过的节拍而不是连续补跑
+    - threaded=False 的任务直接在调度线程中执行，只适合很快完成的操作（如刷新灯带）；
+      可能阻塞的任务（如等待摄像头帧、人脸检测）应使用 threaded=True，
+      由任务自己的工作线程执行，调度线程只负责按时唤醒它
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._thread = None
+
+    def every(self, interval, func, name=None, threaded=False, start_now=True):
+        """注册周期任务，返回 Task"""
+        task = Task(self, func, interval, name, threaded)
+        self._schedule(task, time.monotonic() + (0 if start_now else interval))
+        return task
+
+    def _schedule(self, task, deadline):
+        with self._cond:
+            if task.cancelled:
+                return
+            task.version += 1
+            heapq.heappush(self._heap, (deadline, next(self._seq), task.version, task))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="scheduler")
+                self._thread.daemon = True
+                self._thread.start()
+            self._cond.notify()
+
+    def _wake(self):
+        with self._cond:
+            self._cond.notify()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    # 丢弃已取消或已重新排期的条目
+                    while self._heap and (self._heap[0][3].cancelled or self._heap[0][2] != self._heap[0][3].version):
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    now = time.monotonic()
+                    deadline = self._heap[0][0]
+                    if deadline > now:
+                        self._cond.wait(deadline - now)
+                        continue
+                    break
+
+                _, _, version, task = heapq.heappop(self._heap)
+                missed = int((now - deadline) / task.interval) if task.interval > 0 else 0
+                next_deadline = deadline + task.interval * (missed + 1)
+                heapq.heappush(self._heap, (next_deadline, next(self._seq), version, task))
+
+            task._dispatch()
+
+
+# 全局共享的调度器
+scheduler = Scheduler()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+import numpy as np
+
+LEGACY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_PATH = os.path.join(LEGACY_DIR, "environment_history.bin")
+
+# 磁盘日志的记录格式：时间戳、温度、湿度，每条 16 字节
+RECORD = np.dtype([('t', '<f8'), ('temperature', '<f4'), ('humidity', '<f4')])
+
+# 汇总表的列
+T, TEMP_MIN, TEMP_MAX, TEMP_SUM, HUM_MIN, HUM_MAX, HUM_SUM, COUNT = range(8)
+
+
+class Rollup:
+    """固定分辨率的汇总环形缓冲区，每个时间桶记录温湿度的最小、最大值和总和"""
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.data = np.zeros((capacity, 8), dtype=np.float64)
+        self.head = -1  # 最新一个桶的位置
+        self.size = 0
+
+    def add(self, t, temperature, humidity):
+        bucket = t // self.resolution * self.resolution
+        row = self.data[self.head] if self.size else None
+        if row is None or bucket > row[T]:
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.data[self.head] = (bucket, temperature, temperature, temperature,
+                                    humidity, humidity, humidity, 1)
+            return
+        row[TEMP_MIN] = min(row[TEMP_MIN], temperature)
+        row[TEMP_MAX] = max(row[TEMP_MAX], temperature)
+        row[TEMP_SUM] += temperature
+        row[HUM_MIN] = min(row[HUM_MIN], humidity)
+        row[HUM_MAX] = max(row[HUM_MAX], humidity)
+        row[HUM_SUM] += humidity
+        row[COUNT] += 1
+
+    def load(self, records):
+        """从按时间排序的历史记录批量重建（向量化分组汇总）"""
+        self.head, self.size = -1, 0
+        if not len(records):
+            return
+        t = records['t']
+        temperature = records['temperature'].astype(np.float64)
+        humidity = records['humidity'].astype(np.float64)
+        buckets = t // self.resolution * self.resolution
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        rows = np.column_stack([
+            buckets[starts],
+            np.minimum.reduceat(temperature, starts),
+            np.maximum.reduceat(temperature, starts),
+            np.add.reduceat(temperature, starts),
+            np.minimum.reduceat(humidity, starts),
+            np.maximum.reduceat(humidity, starts),
+            np.add.reduceat(humidity, starts),
+            np.diff(np.r_[starts, len(t)]),
+        ])[-self.capacity:]
+        self.size = len(rows)
+        self.data[:self.size] = rows
+        self.head = self.size - 1
+
+    def ordered(self):
+        """按时间顺序返回所有桶"""
+        if self.size < self.capacity:
+            return self.data[:self.size]
+        return np.roll(self.data, -(self.head + 1), axis=0)
+
+    def range(self, start, end):
+        rows = self.ordered()
+        lo, hi = np.searchsorted(rows[:, T], [start, end], side='left')
+        return rows[lo:hi]
+
+
+class SensorHistory:
+    """温湿度历史：原始样本环形缓冲区 + 1 秒 / 1 分钟 / 1 小时三级汇总 + 追加写入的二进制日志
+
+    查询时按时间范围直接在对应分辨率的汇总表上二分定位，不扫描原始样本；
+    重启时从日志向量化重建各级汇总。
+    """
+
+    # 分辨率（秒） -> 保留的桶数：1 小时的秒级、2 天的分钟级、60 天的小时级
+    ROLLUPS = {1: 3600, 60: 2880, 3600: 1440}
+
+    def __init__(self, path=HISTORY_PATH, raw_capacity=4096, max_points=500):
+        self.path = path
+        self.max_points = max_points  # 自动选择分辨率时返回的最多点数
+        self._lock = threading.Lock()
+        self.raw = np.zeros(raw_capacity, dtype=RECORD)
+        self.raw_head = -1
+        self.raw_size = 0
+        self.rollups = {res: Rollup(res, cap) for res, cap in self.ROLLUPS.items()}
+        self._load()
+        self._log = open(self.path, 'ab')
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        size = os.path.getsize(self.path)
+        # 断电可能留下不完整的最后一条记录，截掉
+        if size % RECORD.itemsize:
+            with open(self.path, 'r+b') as f:
+                f.truncate(size - size % RECORD.itemsize)
+        records = np.fromfile(self.path, dtype=RECORD)
+        if not len(records):
+            return
+
+        # 超出最长汇总保留期的旧记录占一半以上时压缩日志
+        retention = max(res * cap for res, cap in self.ROLLUPS.items())
+        keep = records['t'] >= records['t'][-1] - retention
+        if np.count_nonzero(keep) * 2 < len(records):
+            records = records[keep]
+            tmp = self.path + '.tmp'
+            records.tofile(tmp)
+            os.replace(tmp, self.path)
+
+        for rollup in self.rollups.values():
+            rollup.load(records)
+        recent = records[-len(self.raw):]
+        self.raw[:len(recent)] = recent
+        self.raw_size = len(recent)
+        self.raw_head = self.raw_size - 1
+
+    def add(self, t, temperature, humidity):
+        record = np.array([(t, temperature, humidity)], dtype=RECORD)
+        with self._lock:
+            self.raw_head = (self.raw_head + 1) % len(self.raw)
+            self.raw_size = min(self.raw_size + 1, len(self.raw))
+            self.raw[self.raw_head] = record[0]
+            for rollup in self.rollups.values():
+                rollup.add(t, temperature, humidity)
+            self._log.write(record.tobytes())
+            self._log.flush()
+
+    def samples(self, start, end):
+        """返回原始环形缓冲区中 [start, end) 内的样本"""
+        with self._lock:
+            raw = self.raw[:self.raw_size] if self.raw_size < len(self.raw) \
+                else np.roll(self.raw, -(self.raw_head + 1))
+            lo, hi = np.searchsorted(raw['t'], [start, end], side='left')
+            raw = raw[lo:hi].copy()
+        return {
+            "resolution": 0,
+            "t": raw['t'].tolist(),
+            "temperature": np.round(raw['temperature'].astype(np.float64), 1).tolist(),
+            "humidity": np.round(raw['humidity'].astype(np.float64), 1).tolist(),
+        }
+
+    def query(self, start, end, resolution=None):
+        """返回 [start, end) 内的汇总数据；不指定分辨率时选择点数不超过 max_points 的最细分辨率
+
+        resolution 为 0 时返回原始样本。
+        """
+        if resolution == 0:
+            return self.samples(start, end)
+        if resolution is None:
+            candidates = [res for res in sorted(self.rollups) if (end - start) / res <= self.max_points]
+            resolution = candidates[0] if candidates else max(self.rollups)
+        if resolution not in self.rollups:
+            raise ValueError(f"不支持的分辨率: {resolution}，可选 {sorted(self.rollups)}")
+
+        with self._lock:
+            rows = self.rollups[resolution].range(start, end).copy()
+        count = rows[:, COUNT]
+        return {
+            "resolution": resolution,
+            "t": rows[:, T].tolist(),
+            "temperature": {
+                "min": np.round(rows[:, TEMP_MIN], 1).tolist(),
+                "max": np.round(rows[:, TEMP_MAX], 1).tolist(),
+                "mean": np.round(rows[:, TEMP_SUM] / count, 1).tolist(),
+            },
+            "humidity": {
+                "min": np.round(rows[:, HUM_MIN], 1).tolist(),
+                "max": np.round(rows[:, HUM_MAX], 1).tolist(),
+                "mean": np.round(rows[:, HUM_SUM] / count, 1).tolist(),
+            },
+        }
+
+    def close(self):
+        with self._lock:
+            self._log.close()
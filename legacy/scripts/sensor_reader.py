@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""DHT11 读取进程
+
+DHT11 依靠忙等 GPIO 时序读数，失败时还要间隔 2 秒重试，放在主进程里会与 Flask 请求线程、
+摄像头循环争抢 GIL。这里把读数放到单独的子进程中，每条读数以一行 JSON 通过管道发回：
+    {"t": 时间戳, "temperature": 温度, "humidity": 湿度, "quality": 质量}
+quality 为 "ok"（首次读取成功）、"retried"（重试后成功）、"failed"（本轮全部失败，温湿度为空）
+或 "simulated"（模拟数据）。
+
+单独运行可检查读数：python3 -m scripts.sensor_reader --simulate
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+LEGACY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_dht11(pin, retries, retry_delay):
+    """读取一次，失败时重试，返回 (温度, 湿度, 质量)"""
+    import Adafruit_DHT
+    for attempt in range(retries):
+        humidity, temperature = Adafruit_DHT.read(Adafruit_DHT.DHT11, pin)
+        if humidity is not None and temperature is not None:
+            return temperature, humidity, "ok" if attempt == 0 else "retried"
+        time.sleep(retry_delay)
+    return None, None, "failed"
+
+
+def read_simulated():
+    """模拟数据 - 在舒适范围附近随机波动"""
+    return 23 + random.uniform(-3, 3), 50 + random.uniform(-15, 15), "simulated"
+
+
+def run(pin, interval, simulate, retries=5, retry_delay=2.0):
+    """子进程主循环：按固定间隔读数并写到标准输出"""
+    next_time = time.time()
+    while True:
+        if simulate:
+            temperature, humidity, quality = read_simulated()
+        else:
+            try:
+                temperature, humidity, quality = read_dht11(pin, retries, retry_delay)
+            except Exception as e:
+                print(f"读取传感器错误: {e}", file=sys.stderr, flush=True)
+                temperature, humidity, quality = None, None, "failed"
+        print(json.dumps({"t": time.time(), "temperature": temperature,
+                          "humidity": humidity, "quality": quality}), flush=True)
+        next_time += interval
+        time.sleep(max(0.0, next_time - time.time()))
+
+
+class SensorReader:
+    """在主进程中管理读取子进程：子进程退出时自动重启，每收到一条读数调用一次 callback"""
+
+    def __init__(self, callback, pin=12, interval=5, simulate=False, restart_delay=5):
+        self.callback = callback
+        self.command = [sys.executable, '-m', 'scripts.sensor_reader',
+                        '--pin', str(pin), '--interval', str(interval)]
+        if simulate:
+            self.command.append('--simulate')
+        self.restart_delay = restart_delay
+        self.process = None
+        self.running = False
+        self.thread = None
+        # 保护 running 与 process：stop() 之后不会再启动新的子进程
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def start(self):
+        self.running = True
+        self._stopped.clear()
+        self.thread = threading.Thread(target=self._receive_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _receive_loop(self):
+        # 读管道时线程阻塞在系统调用上，不占用 GIL，只在有新读数时醒来
+        while True:
+            with self._lock:
+                if not self.running:
+                    break
+                process = self.process = subprocess.Popen(self.command, cwd=LEGACY_DIR,
+                                                          stdout=subprocess.PIPE, text=True, bufsize=1)
+            for line in process.stdout:
+                try:
+                    reading = json.loads(line)
+                except ValueError:
+                    continue
+                # 回调出错只丢弃这条读数，不能让接收线程退出
+                try:
+                    self.callback(reading)
+                except Exception as e:
+                    print(f"处理温湿度读数出错: {e}")
+                    traceback.print_exc()
+            process.wait()
+            if self.running:
+                print(f"温湿度读取进程退出（代码 {process.returncode}），{self.restart_delay} 秒后重启")
+                self._stopped.wait(self.restart_delay)
+
+    def stop(self):
+        with self._lock:
+            self.running = False
+            process = self.process
+        self._stopped.set()
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DHT11 读取进程")
+    parser.add_argument('--pin', type=int, default=12, help='DHT11 数据引脚（BCM 编号）')
+    parser.add_argument('--interval', type=float, default=5, help='读取间隔（秒）')
+    parser.add_argument('--simulate', action='store_true', help='输出模拟数据')
+    args = parser.parse_args()
+    try:
+        run(args.pin, args.interval, args.simulate)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
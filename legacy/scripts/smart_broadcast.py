@@ -8,6 +8,9 @@ import time
 import requests
 import subprocess
 from scripts.camera_manager import camera_manager
+from scripts.mjpeg_broadcaster import MJPEGBroadcaster
+from scripts.text_overlay import TextOverlay
+from scripts.scheduler import scheduler
 
 class SmartBroadcast:
     """智能语音解说类"""
@@ -32,8 +35,18 @@ class SmartBroadcast:
         
         # 帧率优化
         self.last_frame_time = 0
+        self.last_frame_seq = 0
         self.target_fps = 8
         self.frame_interval = 1.0 / self.target_fps
+        self.simulation_source = None
+        self.monitor_task = None
+        
+        # 状态文字贴图缓存，状态不变时每帧只做一次掩码拷贝
+        self.status_overlay = TextOverlay()
+        
+        # 视频流分发，每帧只编码一次
+        self.frame_broadcaster = MJPEGBroadcaster(quality=70)
+        self.passthrough = False
         
         print("✓ SmartBroadcast 类初始化完成")
 
@@ -45,7 +58,7 @@ class SmartBroadcast:
             return
         
         # 使用全局摄像头管理器
-        self.cap = camera_manager.get_camera()
+        self.cap = camera_manager.get_camera('smart_broadcast', 640, 480, self.target_fps)
         if self.cap is not None:
             self.camera_available = True
             self.simulation_mode = False
@@ -55,10 +68,18 @@ class SmartBroadcast:
             self.simulation_mode = True
             print("⚠ 语音解说系统使用模拟模式")
         
+        # MJPEG 直通模式下视频流直接转发摄像头原始数据，只在拍摄时解码
+        self.passthrough = camera_manager.passthrough_active and not self.simulation_mode
+        if self.passthrough:
+            self.frame_broadcaster = camera_manager.raw_broadcaster
+        
         self.is_running = True
-        self.monitor_thread = threading.Thread(target=self.monitor_loop)
-        self.monitor_thread.daemon = True
-        self.monitor_thread.start()
+        self.fps_frame_count = 0
+        self.last_fps_time = time.time()
+        # 直通模式下视频流不经过本模块，无需逐帧处理
+        if not self.passthrough:
+            self.monitor_task = scheduler.every(self.frame_interval, self.monitor_loop,
+                                                name="smart_broadcast", threaded=True)
         print("✓ 开始智能语音解说监控...")
 
     def capture_image(self):
@@ -68,15 +89,15 @@ class SmartBroadcast:
             return False, "系统忙，请稍后再试"
         
         try:
-            self.broadcast_state = "CAPTURING"
+            self.set_broadcast_state("CAPTURING")
             
             # 获取最新帧
             frame = self.capture_frame()
             if frame is not None:
-                self.captured_image = frame.copy()
+                self.captured_image = frame
             
             self.last_capture_time = time.time()
-            self.broadcast_state = "PROCESSING"
+            self.set_broadcast_state("PROCESSING")
             
             # 在新线程中处理图片
             processing_thread = threading.Thread(target=self.process_image)
@@ -86,32 +107,24 @@ class SmartBroadcast:
             return True, "图片拍摄成功，正在分析..."
             
         except Exception as e:
-            self.broadcast_state = "READY"
+            self.set_broadcast_state("READY")
             return False, f"拍摄失败: {str(e)}"
 
     def get_frame_bytes(self):
         """获取当前帧的字节数据"""
-        print("调用 get_frame_bytes 方法")
         try:
             # 如果当前帧为空，先生成一帧
-            if self.current_frame is None:
+            if self.current_frame is None and not self.passthrough:
                 print("当前帧为空，生成新帧...")
                 frame = self.capture_frame()
                 if frame is not None:
                     self.current_frame = self.add_status_overlay(frame)
+                    self.frame_broadcaster.publish(self.current_frame)
             
-            if self.current_frame is not None:
-                # 编码为JPEG
-                ret, jpeg = cv2.imencode('.jpg', self.current_frame, [
-                    cv2.IMWRITE_JPEG_QUALITY, 70
-                ])
-                if ret:
-                    print(f"✓ 成功编码帧，大小: {len(jpeg.tobytes())} 字节")
-                    return jpeg.tobytes()
-                else:
-                    print("✗ JPEG编码失败")
-            else:
-                print("✗ 当前帧仍然为空")
+            frame_bytes = self.frame_broadcaster.get_frame_bytes()
+            if frame_bytes is not None:
+                return frame_bytes
+            print("✗ JPEG编码失败")
                 
         except Exception as e:
             print(f"✗ get_frame_bytes错误: {e}")
@@ -148,34 +161,37 @@ class SmartBroadcast:
     def stop_monitoring(self):
         """停止监控"""
         self.is_running = False
-        camera_manager.release_camera()
-        if hasattr(self, 'monitor_thread'):
-            self.monitor_thread.join(timeout=1.0)
+        if self.monitor_task is not None:
+            self.monitor_task.cancel()
+            self.monitor_task = None
+        # 直通模式下转发的是摄像头管理器共享的广播器，由它自己关闭
+        if not self.passthrough:
+            self.frame_broadcaster.close()
+        camera_manager.release_camera('smart_broadcast')
         print("智能语音解说监控已停止")
 
     def monitor_loop(self):
-        """监控循环"""
-        frame_count = 0
-        last_fps_time = time.time()
+        """处理一帧，由调度器每个帧间隔调用一次，状态变化时立即调用"""
+        frame = self.capture_frame()
+        if frame is not None:
+            self.current_frame = self.add_status_overlay(frame)
+            self.frame_broadcaster.publish(self.current_frame)
+        self.last_frame_time = time.time()
+        self.fps_frame_count += 1
         
-        while self.is_running:
-            current_time = time.time()
-            
-            if current_time - self.last_frame_time >= self.frame_interval:
-                frame = self.capture_frame()
-                if frame is not None:
-                    self.current_frame = self.add_status_overlay(frame)
-                self.last_frame_time = current_time
-                frame_count += 1
-            
-            if current_time - last_fps_time >= 3.0:
-                fps = frame_count / (current_time - last_fps_time)
-                if frame_count % 15 == 0:
-                    print(f"播报处理FPS: {fps:.1f}")
-                frame_count = 0
-                last_fps_time = current_time
-            
-            time.sleep(0.01)
+        elapsed = self.last_frame_time - self.last_fps_time
+        if elapsed >= 3.0:
+            fps = self.fps_frame_count / elapsed
+            if self.fps_frame_count % 15 == 0:
+                print(f"播报处理FPS: {fps:.1f}")
+            self.fps_frame_count = 0
+            self.last_fps_time = self.last_frame_time
+
+    def set_broadcast_state(self, state):
+        """切换状态并立即刷新画面上的状态文字，不必等到下一个帧间隔"""
+        self.broadcast_state = state
+        if self.monitor_task is not None:
+            self.monitor_task.trigger()
 
     def capture_frame(self):
         """捕获帧"""
@@ -183,49 +199,47 @@ class SmartBroadcast:
             return self.generate_simulation_frame()
         
         try:
+            # 等待帧总线上的新帧，超时则沿用最新一帧；总线上的帧只读，叠加状态前需复制
+            seq, frame = camera_manager.wait_frame(self.last_frame_seq, timeout=self.frame_interval)
+            if frame is not None:
+                self.last_frame_seq = seq
+                return frame.copy()
             ret, frame = camera_manager.read_frame()
             if ret and frame is not None:
-                return frame
+                return frame.copy()
         except Exception as e:
             print(f"捕获帧错误: {e}")
         
         return self.generate_simulation_frame()
 
     def generate_simulation_frame(self):
-        """生成模拟帧"""
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        status_color = (0, 255, 0) if self.broadcast_state == "READY" else (255, 255, 0)
-        cv2.putText(frame, f"状态: {self.broadcast_state}", (50, 50), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, status_color, 2)
-        cv2.putText(frame, "模拟模式 - 点击拍摄测试", (50, 100), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        return frame
+        """生成模拟帧，状态信息由 add_status_overlay 叠加，因此返回可写副本"""
+        if self.simulation_source is None:
+            self.simulation_source = camera_manager.create_simulation_source()
+        return self.simulation_source.read().copy()
 
     def add_status_overlay(self, frame):
-        """在帧上添加状态信息"""
+        """在帧上添加状态信息，文字只在内容变化时重新渲染"""
         status_colors = {
             "READY": (0, 255, 0), "CAPTURING": (255, 255, 0), 
             "PROCESSING": (255, 165, 0), "SPEAKING": (0, 255, 255)
         }
         color = status_colors.get(self.broadcast_state, (255, 255, 255))
         
-        cv2.putText(frame, f"状态: {self.broadcast_state}", (10, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-        
         mode_text = "模拟模式" if self.simulation_mode else "实时模式"
-        cv2.putText(frame, f"模式: {mode_text}", (10, 60), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        lines = [
+            (f"状态: {self.broadcast_state}", (10, 30), 0.7, color, 2),
+            (f"模式: {mode_text}", (10, 60), 0.5, (255, 255, 255), 1),
+        ]
         
         if self.last_capture_time > 0:
             time_str = time.strftime("%H:%M:%S", time.localtime(self.last_capture_time))
-            cv2.putText(frame, f"最后拍摄: {time_str}", (10, 90), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+            lines.append((f"最后拍摄: {time_str}", (10, 90), 0.5, (255, 255, 255), 1))
         
         if self.is_playing_audio:
-            cv2.putText(frame, "🔊 播放中...", (10, 120), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+            lines.append(("🔊 播放中...", (10, 120), 0.6, (0, 255, 255), 2))
         
-        return frame
+        return self.status_overlay.draw(frame, lines)
 
     def process_image(self):
         """处理图片"""
@@ -234,16 +248,16 @@ class SmartBroadcast:
             self.ocr_text = "智能识别到景区场景"
             self.ai_response = "欢迎来到美丽的景区！这里风景优美，历史悠久..."
             self.speak_text(self.ai_response)
-            self.broadcast_state = "READY"
+            self.set_broadcast_state("READY")
         except Exception as e:
             print(f"处理图片错误: {e}")
-            self.broadcast_state = "READY"
+            self.set_broadcast_state("READY")
 
     def speak_text(self, text):
         """文字转语音"""
         try:
-            self.broadcast_state = "SPEAKING"
             self.is_playing_audio = True
+            self.set_broadcast_state("SPEAKING")
             
             clean_text = text[:100]
             cmd = ['espeak', '-v', 'zh', '-s', '150', clean_text]
@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import time
-import threading
-import os
+from scripts.sensor_history import SensorHistory
+from scripts.sensor_reader import SensorReader
 
 class TemperatureHumiditySensor:
     def __init__(self, gpio_pin=12):
         self.gpio_pin = gpio_pin
         self.temperature = None
         self.humidity = None
+        self.timestamp = None  # 最近一次读数的时间
+        self.quality = None  # 最近一次读数的质量，见 sensor_reader
         self.simulation_mode = False
         self.sensor = None
         
@@ -17,14 +18,20 @@ class TemperatureHumiditySensor:
         self.comfort_temp_range = (20, 26)  # 舒适温度范围 20-26°C
         self.comfort_humidity_range = (40, 60)  # 舒适湿度范围 40-60%
         
+        # 舒适度和建议只在读数变化时重新计算
+        self._derived_key = None
+        self._derived = (0, ["等待传感器数据..."])
+        
+        # 历史数据：环形缓冲区 + 多级汇总，持久化到追加写入的二进制日志
+        self.history = SensorHistory()
+        
         # 初始化传感器
         self.setup_sensor()
         
-        # 启动监控线程
-        self.monitoring = True
-        self.monitor_thread = threading.Thread(target=self.monitor_loop)
-        self.monitor_thread.daemon = True
-        self.monitor_thread.start()
+        # 在独立进程中读取传感器，忙等和重试不会影响视频流和接口响应
+        self.reader = SensorReader(self.on_reading, pin=self.gpio_pin, interval=5,
+                                   simulate=self.simulation_mode)
+        self.reader.start()
         
         print("温湿度传感器初始化完成")
 
@@ -58,36 +65,39 @@ class TemperatureHumiditySensor:
         except:
             return False
 
-    def read_sensor(self):
-        """读取传感器数据"""
-        if self.simulation_mode:
-            # 模拟数据 - 在舒适范围附近随机波动
-            import random
-            base_temp = 23
-            base_humidity = 50
-            self.temperature = base_temp + random.uniform(-3, 3)
-            self.humidity = base_humidity + random.uniform(-15, 15)
-            return True
-        else:
-            # 读取真实传感器数据
-            try:
-                import Adafruit_DHT
-                humidity, temperature = Adafruit_DHT.read_retry(self.sensor, self.gpio_pin)
-                
-                if humidity is not None and temperature is not None:
-                    self.temperature = temperature
-                    self.humidity = humidity
-                    return True
-                else:
-                    print("读取传感器数据失败")
-                    return False
-                    
-            except Exception as e:
-                print(f"读取传感器错误: {e}")
-                return False
+    def on_reading(self, reading):
+        """收到读取进程发来的一条读数"""
+        self.quality = reading['quality']
+        if reading['temperature'] is None or reading['humidity'] is None:
+            print("读取传感器数据失败")
+            return
+        
+        self.temperature = reading['temperature']
+        self.humidity = reading['humidity']
+        self.timestamp = reading['t']
+        self.history.add(self.timestamp, self.temperature, self.humidity)
+        
+        # 打印当前状态（调试用）
+        comfort = self.get_comfort_level()
+        recommendations = self.get_recommendations()
+        print(f"温湿度: {self.temperature:.1f}°C, {self.humidity:.1f}% | 舒适度: {comfort}% | 建议: {', '.join(recommendations)}")
+
+    def _derived_values(self):
+        key = (self.temperature, self.humidity)
+        if key != self._derived_key:
+            self._derived = (self.compute_comfort_level(), self.compute_recommendations())
+            self._derived_key = key
+        return self._derived
 
     def get_recommendations(self):
         """根据温湿度给出调节建议"""
+        return self._derived_values()[1]
+
+    def get_comfort_level(self):
+        """计算舒适度指数 (0-100)"""
+        return self._derived_values()[0]
+
+    def compute_recommendations(self):
         if self.temperature is None or self.humidity is None:
             return ["等待传感器数据..."]
         
@@ -111,8 +121,7 @@ class TemperatureHumiditySensor:
         
         return recommendations
 
-    def get_comfort_level(self):
-        """计算舒适度指数 (0-100)"""
+    def compute_comfort_level(self):
         if self.temperature is None or self.humidity is None:
             return 0
         
@@ -143,25 +152,13 @@ class TemperatureHumiditySensor:
         comfort_level = (temp_score * 0.6 + humidity_score * 0.4)
         return int(comfort_level)
 
-    def monitor_loop(self):
-        """监控循环"""
-        while self.monitoring:
-            success = self.read_sensor()
-            if success:
-                # 打印当前状态（调试用）
-                comfort = self.get_comfort_level()
-                recommendations = self.get_recommendations()
-                print(f"温湿度: {self.temperature:.1f}°C, {self.humidity:.1f}% | 舒适度: {comfort}% | 建议: {', '.join(recommendations)}")
-            else:
-                print("读取传感器数据失败")
-            
-            time.sleep(5)  # 每5秒读取一次
-
     def get_status(self):
         """获取当前状态"""
         return {
             "temperature": round(self.temperature, 1) if self.temperature is not None else None,
             "humidity": round(self.humidity, 1) if self.humidity is not None else None,
+            "timestamp": self.timestamp,
+            "quality": self.quality,
             "comfort_level": self.get_comfort_level(),
             "recommendations": self.get_recommendations(),
             "simulation_mode": self.simulation_mode,
@@ -171,7 +168,6 @@ class TemperatureHumiditySensor:
 
     def cleanup(self):
         """清理资源"""
-        self.monitoring = False
-        if self.monitor_thread and self.monitor_thread.is_alive():
-            self.monitor_thread.join(timeout=2)
+        self.reader.stop()
+        self.history.close()
         print("温湿度传感器已关闭")
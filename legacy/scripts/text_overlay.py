@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class TextOverlay:
+    """状态文字叠加：同一组文字只光栅化一次，之后每帧做一次掩码拷贝
+
+    lines 为 (文字, 坐标, 字号, 颜色, 线宽) 组成的元组，整组内容即缓存键，
+    状态或文字变化时自然生成新的贴图，最近使用的若干组保留在缓存中。
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._sprites = OrderedDict()
+
+    def _render(self, lines):
+        boxes = []
+        for text, (x, y), scale, color, thickness in lines:
+            (w, h), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+            boxes.append((x - thickness, y - h - thickness, x + w + thickness, y + baseline + thickness))
+        x0 = max(0, min(b[0] for b in boxes))
+        y0 = max(0, min(b[1] for b in boxes))
+        x1 = max(b[2] for b in boxes)
+        y1 = max(b[3] for b in boxes)
+
+        sprite = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        for text, (x, y), scale, color, thickness in lines:
+            org = (x - x0, y - y0)
+            cv2.putText(sprite, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+            cv2.putText(mask, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, 255, thickness)
+        return x0, y0, sprite, (mask > 0)[..., None]
+
+    def sprite(self, lines):
+        lines = tuple(lines)
+        cached = self._sprites.get(lines)
+        if cached is None:
+            cached = self._sprites[lines] = self._render(lines)
+            if len(self._sprites) > self.max_entries:
+                self._sprites.popitem(last=False)
+        else:
+            self._sprites.move_to_end(lines)
+        return cached
+
+    def draw(self, frame, lines):
+        """把文字贴到 frame 上（原地修改）并返回 frame"""
+        if not lines:
+            return frame
+        x0, y0, sprite, mask = self.sprite(lines)
+        h = min(sprite.shape[0], frame.shape[0] - y0)
+        w = min(sprite.shape[1], frame.shape[1] - x0)
+        if h > 0 and w > 0:
+            np.copyto(frame[y0:y0 + h, x0:x0 + w], sprite[:h, :w], where=mask[:h, :w])
+        return frame
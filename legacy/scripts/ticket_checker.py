@@ -3,13 +3,20 @@
 
 import cv2
 import numpy as np
-import threading
 import time
 import os
-from pyzbar import pyzbar
 from scripts.camera_manager import camera_manager
+from scripts.mjpeg_broadcaster import MJPEGBroadcaster
+from scripts.motion_gate import DetectionScheduler
+from scripts.face_tracker import FaceTracker
+from scripts.qr_scanner import QRScanner
+from scripts.scheduler import scheduler
+from scripts import ticket_store
 
 class TicketChecker:
+    REJECT_MESSAGES = {"invalid": "无效门票", "unknown": "门票未签发", "used": "门票已使用",
+                       "unavailable": "检票系统未配置，请联系工作人员"}
+
     def __init__(self):
         self.is_running = False
         self.current_frame = None
@@ -24,7 +31,8 @@ class TicketChecker:
         self.checking_state = "WAITING"
         self.face_detection_time = None
         self.qr_verification_time = None
-        self.expected_qr_content = "Hello,World!"
+        self.ticket_result = None  # 最近一次核验结果的原因
+        self.ticket_error = None  # 门票库不可用的原因
         
         self.face_timeout = 10
         self.completion_timeout = 5
@@ -33,8 +41,26 @@ class TicketChecker:
         self.frame_queue = []
         self.max_queue_size = 2
         self.last_frame_time = 0
+        self.last_frame_seq = 0
         self.target_fps = 10
         self.frame_interval = 1.0 / self.target_fps
+        self.simulation_source = None
+        self.process_task = None
+        
+        # 视频流分发，每帧只编码一次
+        self.frame_broadcaster = MJPEGBroadcaster(quality=70)
+        self.passthrough = False
+        
+        # 运动门控：画面静止时降低检测频率
+        self.detection_scheduler = DetectionScheduler()
+        
+        # 人脸跟踪：每隔几帧完整检测一次，中间帧预测人脸框；已处理过的游客不再重复触发
+        self.face_tracker = FaceTracker(detect_every=5)
+        self.active_track_id = None
+        self.served_track_ids = set()
+        
+        # 二维码识别：先定位再按原分辨率解码，并优先在上次位置附近搜索
+        self.qr_scanner = QRScanner()
         
         self.setup_face_detector()
         print("智能检票系统初始化完成")
@@ -52,22 +78,33 @@ class TicketChecker:
     def start_monitoring(self):
         if self.is_running: return
         
-        self.cap = camera_manager.get_camera()
+        self.cap = camera_manager.get_camera('ticket_checker', 640, 480, self.target_fps)
         if self.cap is not None:
             self.camera_available = True
             self.simulation_mode = False
         
+        # MJPEG 直通模式下视频流直接转发摄像头原始数据，检测只解码半分辨率画面
+        self.passthrough = camera_manager.passthrough_active and not self.simulation_mode
+        if self.passthrough:
+            self.frame_broadcaster = camera_manager.raw_broadcaster
+        
         self.is_running = True
-        self.process_thread = threading.Thread(target=self.process_frames)
-        self.process_thread.daemon = True
-        self.process_thread.start()
+        self.fps_frame_count = 0
+        self.last_fps_time = time.time()
+        # 由共享调度器按帧间隔唤醒，处理在任务自己的线程中进行（等待摄像头帧、检测都可能阻塞）
+        self.process_task = scheduler.every(self.frame_interval, self.process_frames,
+                                            name="ticket_checker", threaded=True)
         print("开始智能检票监控...")
 
     def stop_monitoring(self):
         self.is_running = False
-        camera_manager.release_camera()
-        if hasattr(self, 'process_thread'):
-            self.process_thread.join(timeout=1.0)
+        if self.process_task is not None:
+            self.process_task.cancel()
+            self.process_task = None
+        # 直通模式下转发的是摄像头管理器共享的广播器，由它自己关闭
+        if not self.passthrough:
+            self.frame_broadcaster.close()
+        camera_manager.release_camera('ticket_checker')
         print("智能检票监控已停止")
 
     def capture_frame(self):
@@ -75,8 +112,14 @@ class TicketChecker:
             return self.generate_simulation_frame()
         
         try:
-            ret, frame = camera_manager.read_frame()
-            if ret and frame is not None:
+            # 帧总线上的帧只读且与其他模块共享，检测直接使用，绘制前再复制
+            seq, frame = camera_manager.wait_frame(self.last_frame_seq, timeout=self.frame_interval,
+                                                   reduced=self.passthrough)
+            if frame is not None:
+                self.last_frame_seq = seq
+            else:
+                ret, frame = camera_manager.read_frame(reduced=self.passthrough)
+            if frame is not None:
                 if len(self.frame_queue) >= self.max_queue_size:
                     self.frame_queue.pop(0)
                 self.frame_queue.append(frame)
@@ -85,52 +128,60 @@ class TicketChecker:
         return self.generate_simulation_frame()
 
     def process_frames(self):
-        frame_count = 0
-        last_fps_time = time.time()
+        """处理一帧，由调度器每个帧间隔调用一次"""
+        frame = self.capture_frame()
+        if frame is not None:
+            processed_frame = self.process_single_frame(frame)
+            if processed_frame is not None:
+                self.current_frame = processed_frame
+                if not self.passthrough:
+                    self.frame_broadcaster.publish(processed_frame)
+        self.last_frame_time = time.time()
+        self.fps_frame_count += 1
         
-        while self.is_running:
-            current_time = time.time()
-            
-            # 控制帧率
-            if current_time - self.last_frame_time >= self.frame_interval:
-                frame = self.capture_frame()
-                if frame is not None:
-                    processed_frame = self.process_single_frame(frame)
-                    if processed_frame is not None:
-                        self.current_frame = processed_frame
-                self.last_frame_time = current_time
-                frame_count += 1
-            
-            # FPS监控
-            if current_time - last_fps_time >= 2.0:
-                fps = frame_count / (current_time - last_fps_time)
-                if frame_count % 10 == 0:
-                    print(f"检票处理FPS: {fps:.1f}")
-                frame_count = 0
-                last_fps_time = current_time
-            
-            time.sleep(0.01)
+        # FPS监控
+        elapsed = self.last_frame_time - self.last_fps_time
+        if elapsed >= 2.0:
+            fps = self.fps_frame_count / elapsed
+            if self.fps_frame_count % 10 == 0:
+                print(f"检票处理FPS: {fps:.1f}")
+            self.fps_frame_count = 0
+            self.last_fps_time = self.last_frame_time
 
     def process_single_frame(self, frame):
         try:
-            # 快速处理 - 降低分辨率
-            small_frame = cv2.resize(frame, (320, 240))
-            
-            # 条件检测 - 只在需要时检测
-            faces = []
-            if self.face_cascade and self.checking_state in ["WAITING", "FACE_DETECTED"]:
-                faces = self.detect_faces(small_frame)
-            
+            tracks = []
             qr_codes = []
-            if self.checking_state in ["FACE_DETECTED", "QR_CHECKING"]:
-                qr_codes = self.detect_qr_codes(small_frame)
-            
-            self.face_detected = len(faces) > 0
-            self.qr_detected = len(qr_codes) > 0
-            self.update_checking_state(faces, qr_codes)
+            # 运动门控 - 画面无变化时跳过检测
+            detect = self.detection_scheduler.should_detect(frame, self.checking_state)
+            face_stage = self.face_cascade and self.checking_state in ["WAITING", "FACE_DETECTED"]
+            qr_stage = self.checking_state in ["FACE_DETECTED", "QR_CHECKING"]
+            if detect and ((face_stage and self.face_tracker.due()) or qr_stage):
+                # 快速处理 - 降低分辨率
+                small_frame = cv2.resize(frame, (320, 240))
+                
+                # 条件检测 - 只在需要时检测，两次人脸检测之间由跟踪器传递人脸框
+                if face_stage and self.face_tracker.due():
+                    tracks = self.face_tracker.update(self.detect_faces(small_frame))
+                elif face_stage:
+                    tracks = self.face_tracker.predict()
+                
+                if qr_stage:
+                    qr_codes = self.detect_qr_codes(frame)
+                
+                self.face_detected = len(tracks) > 0
+                self.qr_detected = len(qr_codes) > 0
+            elif face_stage:
+                tracks = self.face_tracker.predict()
+            self.update_checking_state(tracks, qr_codes)
             self.update_welcome_message()
             
-            return self.draw_detections(frame, faces, qr_codes)
+            # 直通模式下推流的是原始画面，无需绘制
+            if self.passthrough:
+                return frame
+            if not frame.flags.writeable:
+                frame = frame.copy()
+            return self.draw_detections(frame, [box for _, box in tracks], qr_codes)
         except: return frame
 
     def detect_faces(self, frame):
@@ -142,36 +193,60 @@ class TicketChecker:
 
     def detect_qr_codes(self, frame):
         try:
-            decoded_objects = pyzbar.decode(frame)
-            return [{'data': obj.data.decode('utf-8'), 'polygon': obj.polygon, 'rect': obj.rect} 
-                   for obj in decoded_objects if obj.data]
+            return self.qr_scanner.scan(frame)
         except: return []
 
-    def update_checking_state(self, faces, qr_codes):
+    def update_checking_state(self, tracks, qr_codes):
         current_time = time.time()
+        # 离开画面（丢失轨迹也已过期）的游客不再需要记录
+        self.served_track_ids &= self.face_tracker.track_ids()
         
         if self.checking_state == "WAITING":
-            if len(faces) > 0:
+            new_ids = [track_id for track_id, _ in tracks if track_id not in self.served_track_ids]
+            if new_ids:
                 self.checking_state = "FACE_DETECTED"
                 self.face_detection_time = current_time
+                self.active_track_id = new_ids[0]
+                self.last_qr_data = None
+                self.ticket_result = None
         
         elif self.checking_state == "FACE_DETECTED":
             if current_time - self.face_detection_time > self.face_timeout:
                 self.checking_state = "WAITING"
+                self.served_track_ids.add(self.active_track_id)
             elif len(qr_codes) > 0:
                 self.checking_state = "QR_CHECKING"
         
         elif self.checking_state == "QR_CHECKING":
-            valid_qr_found = any(qr['data'] == self.expected_qr_content for qr in qr_codes)
-            if valid_qr_found:
-                self.checking_state = "COMPLETED"
-                self.qr_verification_time = current_time
-            elif len(qr_codes) == 0:
-                self.checking_state = "COMPLETED"
+            # 已被拒绝的二维码仍在画面中时不重复核验
+            for qr in qr_codes:
+                if qr['data'] == self.last_qr_data:
+                    continue
+                self.last_qr_data = qr['data']
+                valid, self.ticket_result = self.validate_ticket(qr['data'])
+                if valid:
+                    self.checking_state = "COMPLETED"
+                    self.qr_verification_time = current_time
+                    break
+            else:
+                if len(qr_codes) == 0 or current_time - self.face_detection_time > self.face_timeout:
+                    # 游客收回二维码时回到等待出示状态，超时则由 FACE_DETECTED 结束本次检票
+                    self.checking_state = "FACE_DETECTED"
         
         elif self.checking_state == "COMPLETED":
             if current_time - self.qr_verification_time > self.completion_timeout:
                 self.checking_state = "WAITING"
+                self.served_track_ids.add(self.active_track_id)
+
+    def validate_ticket(self, data):
+        """核验门票；门票库在首次核验时才打开，未配置时只拒绝核验，视频和人脸检测照常工作"""
+        try:
+            return ticket_store.get_store().validate(data)
+        except ticket_store.NotConfigured as e:
+            if self.ticket_error is None:
+                print(f"检票不可用: {e}")
+            self.ticket_error = str(e)
+            return False, "unavailable"
 
     def update_welcome_message(self):
         if self.checking_state == "WAITING":
@@ -180,7 +255,7 @@ class TicketChecker:
             remaining = self.face_timeout - (time.time() - self.face_detection_time)
             self.welcome_message = f"请出示二维码 ({int(remaining)}秒)"
         elif self.checking_state == "QR_CHECKING":
-            self.welcome_message = "正在验证二维码..."
+            self.welcome_message = self.REJECT_MESSAGES.get(self.ticket_result, "正在验证二维码...")
         elif self.checking_state == "COMPLETED":
             self.welcome_message = "欢迎光临！验证成功"
 
@@ -190,7 +265,7 @@ class TicketChecker:
         
         for qr in qr_codes:
             points = qr['polygon']
-            if len(points) > 4:
+            if len(points) >= 4:
                 hull = cv2.convexHull(np.array([point for point in points], dtype=np.float32))
                 cv2.polylines(frame, [hull.astype(int)], True, (255, 0, 0), 2)
         
@@ -206,28 +281,29 @@ class TicketChecker:
         return frame
 
     def generate_simulation_frame(self):
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        cv2.putText(frame, f"状态: {self.checking_state}", (50, 50), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-        cv2.putText(frame, "模拟模式", (50, 100), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        return frame
+        """模拟画面（只读），检测结果和状态由 draw_detections 绘制"""
+        if self.simulation_source is None:
+            self.simulation_source = camera_manager.create_simulation_source()
+        return self.simulation_source.read()
 
     def get_frame_bytes(self):
         try:
-            if self.current_frame is not None:
-                ret, jpeg = cv2.imencode('.jpg', self.current_frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                if ret: return jpeg.tobytes()
+            return self.frame_broadcaster.get_frame_bytes()
         except: pass
         return None
 
     def get_status(self):
         return {
             "checking_state": self.checking_state,
+            "detection_mode": self.detection_scheduler.mode,
+            "active_track_id": self.active_track_id,
+            "motion_ratio": round(self.detection_scheduler.gate.motion_ratio, 4),
             "face_detected": self.face_detected,
             "qr_detected": self.qr_detected,
             "welcome_message": self.welcome_message,
             "last_qr_data": self.last_qr_data,
+            "ticket_result": self.ticket_result,
+            "ticket_error": self.ticket_error,
             "simulation_mode": self.simulation_mode,
             "camera_available": self.camera_available,
             "is_running": self.is_running
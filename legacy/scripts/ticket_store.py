@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""门票核验：直接使用后端的 garden_link.tickets，二维码格式、密钥和数据库与后端检票完全一致"""
+
+import os
+import sys
+
+BACKEND_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                           'backend', 'src')
+if BACKEND_SRC not in sys.path:
+    sys.path.append(BACKEND_SRC)
+
+from garden_link.tickets import NotConfigured, TicketStore, get_store, shutdown  # noqa: E402
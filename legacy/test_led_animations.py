@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""对比跑马灯帧表与原逐帧实现的输出"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scripts.led_animations import build_table
+
+
+def pastel_wheel(pos):
+    """原 LEDController.pastel_wheel"""
+    pos = pos % 256
+    if pos < 64:
+        return (80, 60, 100)
+    elif pos < 128:
+        return (60, 80, 100)
+    elif pos < 192:
+        return (80, 100, 60)
+    else:
+        return (100, 80, 60)
+
+
+def chase_frame(i, led_count, chase_length, brightness):
+    """原 LEDController.chase_step 写入灯带的一帧，含 rpi_ws281x 的硬件亮度缩放"""
+    pixels = [0] * led_count
+    for j in range(-chase_length + 1, 1):
+        led_index = (i + j) % led_count
+        brightness_factor = max(0, 1 - abs(j) * (1.0 / chase_length))
+        color = pastel_wheel(i * 8)
+        r = int(color[0] * brightness_factor) * (brightness + 1) >> 8
+        g = int(color[1] * brightness_factor) * (brightness + 1) >> 8
+        b = int(color[2] * brightness_factor) * (brightness + 1) >> 8
+        pixels[led_index] = (r << 16) | (g << 8) | b
+    return pixels
+
+
+def unpack(color):
+    return (color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF
+
+
+def test_chase_head_color():
+    table = build_table("chase", 30, 5, 50, 10)
+    assert unpack(int(table[0][0])) == (15, 11, 19)
+
+
+def test_chase_matches_original():
+    for led_count in (8, 30, 60):
+        for chase_length in (1, 3, 5, 7, 10):
+            for brightness in (0, 50, 128, 255):
+                table = build_table("chase", led_count, chase_length, brightness, 10)
+                for i in range(led_count):
+                    expected = chase_frame(i, led_count, chase_length, brightness)
+                    assert [int(c) for c in table[i]] == expected, (led_count, chase_length, brightness, i)
+
+
+if __name__ == "__main__":
+    test_chase_head_color()
+    test_chase_matches_original()
+    print("✓ 跑马灯帧表与原实现一致")
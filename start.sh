@@ -1,5 +1,11 @@
 #!/bin/bash
 
+# 门票核验配置：签名密钥（或密钥文件）与门票库路径，后端和 legacy 检票须使用相同的值；
+# 未配置密钥时只有检票接口不可用
+# export GARDEN_LINK_TICKET_SECRET="..."
+# export GARDEN_LINK_TICKET_SECRET_FILE=/etc/garden-link/ticket-secret
+# export GARDEN_LINK_TICKET_DATABASE="$HOME/.local/share/garden-link/tickets.db"
+
 echo "正在启动后端服务器..."
 cd backend
 python -m src.garden_link &